@@ -1,5 +1,8 @@
+import functools
 import logging
 import os
+import threading
+import time
 
 from flask import Flask
 from flask_cors import CORS
@@ -7,12 +10,19 @@ from flask_sqlalchemy import SQLAlchemy
 
 from config import config_by_name
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"expire_on_commit": False})
 logger = logging.getLogger(__name__)
 
+R2_HEALTH_CACHE_SECONDS = 60
+_R2_HEALTH_LOCK = threading.Lock()
 
-def validate_r2_config(app):
-    """Validate R2 configuration on startup."""
+_ALLOWED_ORIGINS = os.environ.get(
+    "CORS_ALLOWED_ORIGINS", "http://localhost:8000,https://peek.cx"
+).split(",")
+
+
+def validate_r2_config(app, check_bucket=None):
+    """Validate R2 configuration, optionally probing the bucket over the network."""
     required_vars = [
         "R2_ACCOUNT_ID",
         "R2_ACCESS_KEY_ID",
@@ -29,22 +39,20 @@ def validate_r2_config(app):
         )
         return False
 
+    if check_bucket is None:
+        check_bucket = app.config.get("R2_VALIDATE_ON_STARTUP", False)
+
+    if not check_bucket:
+        return True
+
     try:
-        import boto3
         from botocore.exceptions import ClientError, NoCredentialsError
 
-        s3_client = boto3.client(
-            "s3",
-            endpoint_url=f"https://{app.config['R2_ACCOUNT_ID']}.r2.cloudflarestorage.com",
-            aws_access_key_id=app.config["R2_ACCESS_KEY_ID"],
-            aws_secret_access_key=app.config["R2_SECRET_ACCESS_KEY"],
-            region_name=app.config.get("R2_REGION", "auto"),
-        )
+        from app.services.storage_service import StorageService
 
+        s3_client = StorageService._get_r2_probe_client()
         s3_client.head_bucket(Bucket=app.config["R2_BUCKET_NAME"])
-        logger.info(
-            f"R2 storage configured successfully. Bucket: {app.config['R2_BUCKET_NAME']}"
-        )
+        logger.debug(f"R2 bucket {app.config['R2_BUCKET_NAME']} is reachable")
         return True
 
     except NoCredentialsError:
@@ -70,6 +78,18 @@ def validate_r2_config(app):
         return False
 
 
+@functools.lru_cache(maxsize=1)
+def _check_r2_storage(app, time_bucket):
+    return validate_r2_config(app, check_bucket=True)
+
+
+def check_r2_storage(app):
+    """Probe the R2 bucket, reusing the result for R2_HEALTH_CACHE_SECONDS."""
+    # lru_cache does not coalesce concurrent misses; only one request probes R2.
+    with _R2_HEALTH_LOCK:
+        return _check_r2_storage(app, int(time.time() // R2_HEALTH_CACHE_SECONDS))
+
+
 def create_app(config_name=None):
     app = Flask(__name__)
 
@@ -80,12 +100,9 @@ def create_app(config_name=None):
 
     db.init_app(app)
 
-    allowed_origins = os.environ.get(
-        "CORS_ALLOWED_ORIGINS", "http://localhost:8000,https://peek.cx"
-    ).split(",")
     CORS(
         app,
-        origins=allowed_origins,
+        origins=_ALLOWED_ORIGINS,
         supports_credentials=True,
         allow_headers=["Content-Type", "Authorization"],
         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
@@ -93,10 +110,15 @@ def create_app(config_name=None):
 
     with app.app_context():
         from app import models  # noqa: F401
+        from app.analyzers.face_detector import FaceDetector
         from app.routes import api
 
         app.register_blueprint(api.bp)
 
+        FaceDetector.configure_dnn(
+            app.config.get("FACE_DNN_PROTOTXT"), app.config.get("FACE_DNN_MODEL")
+        )
+
         validate_r2_config(app)
 
     return app
@@ -1,30 +1,37 @@
-import numpy as np
-from sklearn.cluster import KMeans
+import math
+
+KMEANS_SAMPLE_SIZE = 20000
 
 
 class ColorAnalyzer:
     @staticmethod
-    def analyze(img_array):
+    def analyze(img_array, gray=None):
+        import cv2
+        import numpy as np
+        from sklearn.cluster import MiniBatchKMeans
+
         try:
             if img_array.size == 0:
                 raise ValueError("Empty image array")
 
-            pixels = img_array.reshape(-1, 3)
+            height, width = img_array.shape[:2]
+            step = max(1, math.ceil(math.sqrt(height * width / KMEANS_SAMPLE_SIZE)))
+            pixels = (
+                img_array[::step, ::step].reshape(-1, 3).astype(np.float32, copy=False)
+            )
 
             n_clusters = min(5, len(pixels))
-            kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+            kmeans = MiniBatchKMeans(
+                n_clusters=n_clusters, random_state=42, n_init=1, batch_size=1024
+            )
             kmeans.fit(pixels)
 
             colors = kmeans.cluster_centers_.astype(int)
-            hex_colors = [f"#{c[0]:02x}{c[1]:02x}{c[2]:02x}" for c in colors]
-
-            brightness = int(
-                np.mean(
-                    0.299 * img_array[:, :, 0]
-                    + 0.587 * img_array[:, :, 1]
-                    + 0.114 * img_array[:, :, 2]
-                )
-            )
+            hex_colors = [f"#{c[2]:02x}{c[1]:02x}{c[0]:02x}" for c in colors]
+
+            if gray is None:
+                gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
+            brightness = int(cv2.mean(gray)[0])
 
             brightness = max(0, min(255, brightness))
 
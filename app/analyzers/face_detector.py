@@ -1,28 +1,147 @@
+import logging
 import os
+import threading
 
-import cv2
+logger = logging.getLogger(__name__)
+
+_FACE_CASCADE = None
+_FACE_NET = None
+_FACE_NET_LOADED = False
+_DNN_PATHS = (None, None)
+_CASCADE_LOCK = threading.Lock()
+
+MAX_DETECTION_DIMENSION = 640
+
+DNN_INPUT_SIZE = 300
+DNN_CONFIDENCE_THRESHOLD = 0.5
+
+
+def _get_face_cascade():
+    global _FACE_CASCADE
+
+    if _FACE_CASCADE is None:
+        import cv2
+
+        cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+        _FACE_CASCADE = cv2.CascadeClassifier(cascade_path)
+    return _FACE_CASCADE
+
+
+def _model_files_exist(*paths):
+    return all(os.path.exists(path) for path in paths)
+
+
+def _get_face_net():
+    global _FACE_NET, _FACE_NET_LOADED
+
+    if _FACE_NET_LOADED:
+        return _FACE_NET
+
+    # Remember failures too so a missing model is not re-probed on every image.
+    _FACE_NET_LOADED = True
+    prototxt, model = _DNN_PATHS
+    if not (prototxt and model):
+        return None
+    if not _model_files_exist(prototxt, model):
+        logger.warning(
+            f"Face DNN model not found ({prototxt}, {model}); using Haar cascade"
+        )
+        return None
+
+    import cv2
+
+    try:
+        net = cv2.dnn.readNetFromCaffe(prototxt, model)
+    except cv2.error as e:
+        logger.warning(f"Failed to load face DNN model: {str(e)}; using Haar cascade")
+        return None
+
+    net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+    net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+    _FACE_NET = net
+    return _FACE_NET
+
+
+def _detect_with_dnn(net, img_array):
+    import cv2
+
+    height, width = img_array.shape[:2]
+    blob = cv2.dnn.blobFromImage(
+        cv2.resize(img_array, (DNN_INPUT_SIZE, DNN_INPUT_SIZE)),
+        1.0,
+        (DNN_INPUT_SIZE, DNN_INPUT_SIZE),
+        (104.0, 177.0, 123.0),
+    )
+
+    with _CASCADE_LOCK:
+        net.setInput(blob)
+        detections = net.forward()
+
+    face_locations = []
+    for detection in detections[0, 0]:
+        if detection[2] < DNN_CONFIDENCE_THRESHOLD:
+            continue
+
+        x1 = max(0, int(detection[3] * width))
+        y1 = max(0, int(detection[4] * height))
+        x2 = min(width, int(detection[5] * width))
+        y2 = min(height, int(detection[6] * height))
+        if x2 <= x1 or y2 <= y1:
+            continue
+
+        face_locations.append({"x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1})
+
+    return {"faces_detected": len(face_locations), "face_locations": face_locations}
 
 
 class FaceDetector:
     @staticmethod
-    def detect(img_array):
-        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+    def configure_dnn(prototxt, model):
+        global _FACE_NET, _FACE_NET_LOADED, _DNN_PATHS
 
-        cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+        with _CASCADE_LOCK:
+            _DNN_PATHS = (prototxt, model)
+            _FACE_NET = None
+            _FACE_NET_LOADED = False
+
+    @staticmethod
+    def detect(img_array, gray=None):
+        import cv2
+
+        with _CASCADE_LOCK:
+            face_net = _get_face_net()
+        if face_net is not None:
+            return _detect_with_dnn(face_net, img_array)
 
-        if not os.path.exists(cascade_path):
+        with _CASCADE_LOCK:
+            face_cascade = _get_face_cascade()
+        if face_cascade.empty():
             return {"faces_detected": 0, "face_locations": []}
 
-        face_cascade = cv2.CascadeClassifier(cascade_path)
+        if gray is None:
+            gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
 
-        faces = face_cascade.detectMultiScale(
-            gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30)
-        )
+        height, width = gray.shape[:2]
+        scale = min(1.0, MAX_DETECTION_DIMENSION / max(height, width))
+        if scale < 1.0:
+            gray = cv2.resize(
+                gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+            )
+
+        with _CASCADE_LOCK:
+            faces = face_cascade.detectMultiScale(
+                gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30)
+            )
 
         face_locations = []
         for x, y, w, h in faces:
             face_locations.append(
-                {"x": int(x), "y": int(y), "width": int(w), "height": int(h)}
+                {
+                    "x": int(round(x / scale)),
+                    "y": int(round(y / scale)),
+                    "width": int(round(w / scale)),
+                    "height": int(round(h / scale)),
+                }
             )
 
         return {"faces_detected": len(faces), "face_locations": face_locations}
@@ -1,13 +1,15 @@
-import cv2
-import numpy as np
-
-
 class QualityAnalyzer:
     @staticmethod
-    def analyze(img_array):
-        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+    def analyze(img_array, gray=None, laplacian=None):
+        import cv2
+
+        if gray is None:
+            gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
 
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+        _, laplacian_std = cv2.meanStdDev(
+            cv2.Laplacian(gray, cv2.CV_16S, dst=laplacian)
+        )
+        laplacian_var = float(laplacian_std[0, 0]) ** 2
         sharpness_score = min(laplacian_var / 10, 100)
 
         if laplacian_var < 100:
@@ -17,7 +19,8 @@ class QualityAnalyzer:
         else:
             blur_level = "low"
 
-        rms_contrast = np.sqrt(np.mean((gray - gray.mean()) ** 2))
+        _, stddev = cv2.meanStdDev(gray)
+        rms_contrast = float(stddev[0, 0])
         contrast_score = min(rms_contrast, 100)
 
         quality_score = min((sharpness_score * 0.6) + (contrast_score * 0.4), 100)
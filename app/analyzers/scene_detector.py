@@ -1,25 +1,21 @@
-import cv2
-import numpy as np
-
-
 class SceneDetector:
     @staticmethod
-    def detect(img_array):
-        hsv = cv2.cvtColor(img_array, cv2.COLOR_RGB2HSV)
-        h, s, v = cv2.split(hsv)
-
-        avg_saturation = np.mean(s)
-        avg_value = np.mean(v)
-
-        blue_mask = cv2.inRange(hsv, np.array([90, 50, 50]), np.array([130, 255, 255]))
-        green_mask = cv2.inRange(hsv, np.array([35, 50, 50]), np.array([85, 255, 255]))
-
-        blue_ratio = np.count_nonzero(blue_mask) / (
-            img_array.shape[0] * img_array.shape[1]
-        )
-        green_ratio = np.count_nonzero(green_mask) / (
-            img_array.shape[0] * img_array.shape[1]
-        )
+    def detect(img_array, hsv=None):
+        import cv2
+        import numpy as np
+
+        if hsv is None:
+            hsv = cv2.cvtColor(img_array, cv2.COLOR_BGR2HSV)
+        _, avg_saturation, avg_value, _ = cv2.mean(hsv)
+
+        # Blue and green share the same saturation/value floor, so one mask and
+        # a hue histogram over it give both pixel counts in a single pass.
+        vivid_mask = cv2.inRange(hsv, np.array([0, 50, 50]), np.array([179, 255, 255]))
+        hue_hist = cv2.calcHist([hsv], [0], vivid_mask, [180], [0, 180]).ravel()
+
+        pixel_count = img_array.shape[0] * img_array.shape[1]
+        blue_ratio = hue_hist[90:131].sum() / pixel_count
+        green_ratio = hue_hist[35:86].sum() / pixel_count
 
         scene_type = "indoor"
         confidence = 0.5
@@ -1,14 +1,51 @@
-import pytesseract
-from PIL import Image
+import threading
+
+_TESS_API = None
+_TESS_LOCK = threading.Lock()
+_TESSEROCR_MISSING = False
+
+MIN_TEXT_EDGE_DENSITY = 0.005
+
+
+def _ocr(pil_image):
+    global _TESS_API, _TESSEROCR_MISSING
+
+    if not _TESSEROCR_MISSING:
+        with _TESS_LOCK:
+            if _TESS_API is None:
+                try:
+                    from tesserocr import PyTessBaseAPI
+                except ImportError:
+                    _TESSEROCR_MISSING = True
+                else:
+                    _TESS_API = PyTessBaseAPI()
+
+            if _TESS_API is not None:
+                _TESS_API.SetImage(pil_image)
+                return _TESS_API.GetUTF8Text()
+
+    import pytesseract
+
+    return pytesseract.image_to_string(pil_image)
 
 
 class TextExtractor:
     @staticmethod
-    def extract(img_array):
-        pil_image = Image.fromarray(img_array)
+    def extract(img_array, gray=None):
+        import cv2
+        from PIL import Image
+
+        if gray is None:
+            gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
+
+        edge_density = cv2.Canny(gray, 100, 200).mean() / 255.0
+        if edge_density < MIN_TEXT_EDGE_DENSITY:
+            return {"text_found": False, "extracted_text": "", "word_count": 0}
+
+        pil_image = Image.fromarray(gray)
 
         try:
-            extracted_text = pytesseract.image_to_string(pil_image).strip()
+            extracted_text = _ocr(pil_image).strip()
         except Exception:
             extracted_text = ""
 
@@ -106,6 +106,7 @@ class Insights(db.Model):
         db.Integer,
         db.ForeignKey("images.id", ondelete="CASCADE"),
         nullable=False,
+        unique=True,
         index=True,
     )
 
@@ -130,14 +131,18 @@ class Insights(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     def __init__(self, **kwargs):
-        if "brightness" in kwargs:
-            self._validate_brightness(kwargs["brightness"])
-        if "quality_score" in kwargs:
-            self._validate_quality_score(kwargs["quality_score"])
-        if "scene_confidence" in kwargs:
-            self._validate_scene_confidence(kwargs["scene_confidence"])
+        self.validate_values(kwargs)
         super(Insights, self).__init__(**kwargs)
 
+    @classmethod
+    def validate_values(cls, values):
+        if "brightness" in values:
+            cls._validate_brightness(values["brightness"])
+        if "quality_score" in values:
+            cls._validate_quality_score(values["quality_score"])
+        if "scene_confidence" in values:
+            cls._validate_scene_confidence(values["scene_confidence"])
+
     @staticmethod
     def _validate_brightness(value):
         if value is not None and (value < 0 or value > 255):
@@ -1,10 +1,10 @@
 import logging
-from io import BytesIO
 
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, Response, current_app, jsonify, request
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
-from app import db
+from app import check_r2_storage, db
 from app.services.image_service import ImageService
 from app.services.storage_service import StorageService
 
@@ -12,6 +12,14 @@ bp = Blueprint("api", __name__, url_prefix="/api")
 logger = logging.getLogger(__name__)
 
 
+def _image_response(data, mimetype):
+    response = Response(data, mimetype=mimetype)
+    content_length = getattr(data, "content_length", None)
+    if content_length is not None:
+        response.content_length = content_length
+    return response
+
+
 @bp.route("/health", methods=["GET"])
 def health_check():
     health_status = {"status": "ok"}
@@ -33,6 +41,11 @@ def health_check():
     except Exception:
         health_status["redis"] = "disconnected"
 
+    if check_r2_storage(current_app._get_current_object()):
+        health_status["storage"] = "connected"
+    else:
+        health_status["storage"] = "disconnected"
+
     status_code = 503 if critical_failure else 200
     return jsonify(health_status), status_code
 
@@ -48,17 +61,12 @@ def analyze_image():
         if file.filename == "":
             return jsonify({"error": "No selected file"}), 400
 
-        if not StorageService.validate_file(file):
+        is_valid, format, (width, height), file_size = (
+            StorageService.validate_and_introspect(file)
+        )
+        if not is_valid:
             return jsonify({"error": "Invalid file type or size"}), 400
 
-        file.seek(0)
-        width, height = StorageService.get_image_dimensions(file)
-        file.seek(0)
-        format = StorageService.get_image_format(file)
-        file.seek(0, 2)
-        file_size = file.tell()
-        file.seek(0)
-
         filepath = StorageService.save_file(file)
 
         result = ImageService.create_analysis_task(
@@ -70,6 +78,8 @@ def analyze_image():
 
         return jsonify(result), 202
 
+    except RequestEntityTooLarge:
+        return jsonify({"error": "File too large"}), 413
     except ValueError as e:
         logger.error(f"Validation error in analyze_image: {str(e)}")
         return jsonify({"error": str(e)}), 400
@@ -91,8 +101,6 @@ def get_results(image_id):
 
         return jsonify(result), 200
 
-    except ValueError:
-        return jsonify({"error": "Invalid image ID"}), 400
     except Exception:
         return jsonify({"error": "Internal server error"}), 500
 
@@ -100,15 +108,13 @@ def get_results(image_id):
 @bp.route("/image/<int:image_id>/original", methods=["GET"])
 def get_original_image(image_id):
     try:
-        data, mimetype = StorageService.get_image(image_id)
+        data, mimetype = StorageService.get_image(image_id, stream=True)
 
         if data is None:
             return jsonify({"error": "Image not found"}), 404
 
-        return send_file(BytesIO(data), mimetype=mimetype, as_attachment=False)
+        return _image_response(data, mimetype)
 
-    except ValueError:
-        return jsonify({"error": "Invalid image ID"}), 400
     except Exception:
         return jsonify({"error": "Internal server error"}), 500
 
@@ -116,15 +122,13 @@ def get_original_image(image_id):
 @bp.route("/image/<int:image_id>/annotated", methods=["GET"])
 def get_annotated_image(image_id):
     try:
-        data, mimetype = StorageService.get_annotated_image(image_id)
+        data, mimetype = StorageService.get_annotated_image(image_id, stream=True)
 
         if data is None:
             return jsonify({"error": "Image not found"}), 404
 
-        return send_file(BytesIO(data), mimetype=mimetype, as_attachment=False)
+        return _image_response(data, mimetype)
 
-    except ValueError:
-        return jsonify({"error": "Invalid image ID"}), 400
     except Exception:
         return jsonify({"error": "Internal server error"}), 500
 
@@ -152,7 +156,5 @@ def get_image_url(image_id):
             200,
         )
 
-    except ValueError:
-        return jsonify({"error": "Invalid image ID"}), 400
     except Exception:
         return jsonify({"error": "Internal server error"}), 500
@@ -1,12 +1,14 @@
 import os
 
-import cv2
-import numpy as np
+JPEG_QUALITY = 85
 
 
 class AnnotationService:
     @staticmethod
     def create_annotated_image(image_data_or_key, face_locations, storage_service=None):
+        import cv2
+        import numpy as np
+
         if storage_service:
             if isinstance(image_data_or_key, str):
                 image_data = storage_service.download_from_r2(image_data_or_key)
@@ -23,27 +25,51 @@ class AnnotationService:
         if img is None:
             raise ValueError("Failed to load image")
 
-        for face in face_locations:
-            x = face.get("x", 0)
-            y = face.get("y", 0)
-            width = face.get("width", 0)
-            height = face.get("height", 0)
-
-            top_left = (x, y)
-            bottom_right = (x + width, y + height)
-
-            cv2.rectangle(img, top_left, bottom_right, (0, 255, 0), 2)
+        if face_locations:
+            boxes = np.array(
+                [
+                    (
+                        face.get("x", 0),
+                        face.get("y", 0),
+                        face.get("width", 0),
+                        face.get("height", 0),
+                    )
+                    for face in face_locations
+                ],
+                dtype=np.int32,
+            )
+            x, y, width, height = boxes.T
+            corners = np.stack(
+                [
+                    np.stack([x, y], axis=1),
+                    np.stack([x + width, y], axis=1),
+                    np.stack([x + width, y + height], axis=1),
+                    np.stack([x, y + height], axis=1),
+                ],
+                axis=1,
+            )
+            cv2.polylines(img, corners, isClosed=True, color=(0, 255, 0), thickness=2)
 
-        success, encoded_img = cv2.imencode(".jpg", img)
-        if not success:
-            raise ValueError("Failed to encode annotated image")
+        if storage_service:
+            success, encoded_img = cv2.imencode(
+                ".jpg",
+                img,
+                [
+                    cv2.IMWRITE_JPEG_QUALITY,
+                    JPEG_QUALITY,
+                    cv2.IMWRITE_JPEG_OPTIMIZE,
+                    1,
+                    cv2.IMWRITE_JPEG_PROGRESSIVE,
+                    1,
+                ],
+            )
+            if not success:
+                raise ValueError("Failed to encode annotated image")
 
-        annotated_data = encoded_img.tobytes()
+            annotated_data = encoded_img.tobytes()
 
-        if storage_service:
             if isinstance(image_data_or_key, str):
-                base_key = image_data_or_key.rsplit(".", 1)[0]
-                ext = image_data_or_key.rsplit(".", 1)[1]
+                base_key, _, ext = image_data_or_key.rpartition(".")
                 annotated_key = f"{base_key}_annotated.{ext}"
             else:
                 annotated_key = "images/annotated_temp.jpg"
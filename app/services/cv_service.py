@@ -1,5 +1,6 @@
-import numpy as np
-from PIL import Image
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from app.analyzers.color_analyzer import ColorAnalyzer
 from app.analyzers.face_detector import FaceDetector
@@ -7,27 +8,130 @@ from app.analyzers.quality_analyzer import QualityAnalyzer
 from app.analyzers.scene_detector import SceneDetector
 from app.analyzers.text_extractor import TextExtractor
 
+UNIFORM_STDDEV_THRESHOLD = 5
+MAX_ANALYSIS_DIMENSION = 1600
+SCRATCH_CACHE_SIZE = 2
+
+_scratch_local = threading.local()
+
+
+class _Scratch:
+    """Reusable per-shape output buffers for the shared color conversions."""
+
+    def __init__(self, height, width):
+        import numpy as np
+
+        self.gray = np.empty((height, width), dtype=np.uint8)
+        self.hsv = np.empty((height, width, 3), dtype=np.uint8)
+        self.laplacian = np.empty((height, width), dtype=np.int16)
+
+
+def _get_scratch(height, width):
+    buffers = getattr(_scratch_local, "buffers", None)
+    if buffers is None:
+        buffers = _scratch_local.buffers = OrderedDict()
+
+    key = (height, width)
+    scratch = buffers.get(key)
+    if scratch is None:
+        scratch = buffers[key] = _Scratch(height, width)
+        if len(buffers) > SCRATCH_CACHE_SIZE:
+            buffers.popitem(last=False)
+    else:
+        buffers.move_to_end(key)
+    return scratch
+
 
 class CVService:
+    @staticmethod
+    def load_image(filepath):
+        import cv2
+        import numpy as np
+        from PIL import Image
+
+        img_bgr = cv2.imread(filepath, cv2.IMREAD_COLOR)
+        if img_bgr is not None:
+            return img_bgr
+
+        # OpenCV cannot decode GIFs; fall back to PIL for formats it rejects.
+        try:
+            with Image.open(filepath) as pil_image:
+                img_rgb = np.array(pil_image.convert("RGB"))
+        except Exception:
+            return None
+        return cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
+
+    @staticmethod
+    def _uniform_image_insights(img_array, gray, hsv):
+        import cv2
+
+        blue, green, red, _ = cv2.mean(img_array)
+        return {
+            "dominant_colors": [f"#{int(red):02x}{int(green):02x}{int(blue):02x}"],
+            "brightness": int(cv2.mean(gray)[0]),
+            "faces_detected": 0,
+            "face_locations": [],
+            **QualityAnalyzer.analyze(img_array, gray=gray),
+            **SceneDetector.detect(img_array, hsv=hsv),
+            "text_found": False,
+            "extracted_text": "",
+            "word_count": 0,
+        }
+
+    @staticmethod
+    def _rescale_face_locations(face_locations, scale):
+        return [
+            {key: int(round(value / scale)) for key, value in location.items()}
+            for location in face_locations
+        ]
+
     @staticmethod
     def process_image(filepath):
+        import cv2
+
         try:
-            pil_image = Image.open(filepath)
-            img_array = np.array(pil_image.convert("RGB"))
-
-            color_results = ColorAnalyzer.analyze(img_array)
-            face_results = FaceDetector.detect(img_array)
-            quality_results = QualityAnalyzer.analyze(img_array)
-            scene_results = SceneDetector.detect(img_array)
-            text_results = TextExtractor.extract(img_array)
-
-            insights = {
-                **color_results,
-                **face_results,
-                **quality_results,
-                **scene_results,
-                **text_results,
-            }
+            img_array = CVService.load_image(filepath)
+            if img_array is None:
+                raise ValueError("Failed to decode image")
+
+            height, width = img_array.shape[:2]
+            scale = min(1.0, MAX_ANALYSIS_DIMENSION / max(height, width))
+            if scale < 1.0:
+                img_array = cv2.resize(
+                    img_array, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+                )
+
+            scratch = _get_scratch(*img_array.shape[:2])
+            gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY, dst=scratch.gray)
+            hsv = cv2.cvtColor(img_array, cv2.COLOR_BGR2HSV, dst=scratch.hsv)
+
+            _, stddev = cv2.meanStdDev(gray)
+            if stddev[0, 0] < UNIFORM_STDDEV_THRESHOLD:
+                return CVService._uniform_image_insights(img_array, gray, hsv)
+
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                futures = [
+                    executor.submit(ColorAnalyzer.analyze, img_array, gray=gray),
+                    executor.submit(FaceDetector.detect, img_array, gray=gray),
+                    executor.submit(
+                        QualityAnalyzer.analyze,
+                        img_array,
+                        gray=gray,
+                        laplacian=scratch.laplacian,
+                    ),
+                    executor.submit(SceneDetector.detect, img_array, hsv=hsv),
+                    executor.submit(TextExtractor.extract, img_array, gray=gray),
+                ]
+
+                insights = {}
+                for future in futures:
+                    insights.update(future.result())
+
+            # Face boxes are reported in the coordinates of the original upload.
+            if scale < 1.0:
+                insights["face_locations"] = CVService._rescale_face_locations(
+                    insights["face_locations"], scale
+                )
 
             return insights
 
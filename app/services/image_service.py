@@ -1,5 +1,8 @@
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
 from app import db
-from app.models import Image, Insights
+from app.models import Image
 
 
 class ImageService:
@@ -32,10 +35,15 @@ class ImageService:
     @staticmethod
     def get_analysis_results(image_id):
         try:
-            if not isinstance(image_id, int):
-                image_id = int(image_id)
-
-            image = db.session.get(Image, image_id)
+            image = (
+                db.session.execute(
+                    select(Image)
+                    .options(joinedload(Image.insights))
+                    .where(Image.id == image_id)
+                )
+                .unique()
+                .scalar_one_or_none()
+            )
 
             if not image:
                 return None
@@ -50,7 +58,7 @@ class ImageService:
             if not image.processed:
                 return {"id": image.id, "status": "processing"}
 
-            insights = db.session.query(Insights).filter_by(image_id=image.id).first()
+            insights = image.insights[0] if image.insights else None
 
             if insights:
                 return {
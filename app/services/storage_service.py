@@ -1,18 +1,20 @@
+import functools
 import logging
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from io import BytesIO
 
-import boto3
-from botocore.client import Config
-from botocore.exceptions import ClientError, EndpointConnectionError
+from botocore.exceptions import ClientError
 from flask import current_app
-from PIL import Image as PILImage
 
 from app import db
 from app.models import Image
 from app.utils.validators import (
+    get_file_size,
     sanitize_filename,
     validate_file_extension,
     validate_file_size,
@@ -21,50 +23,189 @@ from app.utils.validators import (
 
 logger = logging.getLogger(__name__)
 
+_FORMAT_MIMETYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "GIF": "image/gif",
+    "BMP": "image/bmp",
+    "WEBP": "image/webp",
+}
+_DEFAULT_MIMETYPE = "application/octet-stream"
+
+
+@functools.lru_cache(maxsize=1)
+def _upload_transfer_config():
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=4 * 1024 * 1024,
+        multipart_chunksize=4 * 1024 * 1024,
+        max_concurrency=8,
+        use_threads=True,
+    )
+
+
+@dataclass(frozen=True)
+class _R2Settings:
+    account_id: str
+    access_key_id: str
+    secret_access_key: str
+    region: str
+    bucket: str
+    public_domain: str
+    max_pool: int
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            account_id=config.get("R2_ACCOUNT_ID"),
+            access_key_id=config.get("R2_ACCESS_KEY_ID"),
+            secret_access_key=config.get("R2_SECRET_ACCESS_KEY"),
+            region=config.get("R2_REGION", "auto"),
+            bucket=config.get("R2_BUCKET_NAME", "peek"),
+            public_domain=config.get("R2_PUBLIC_DOMAIN"),
+            max_pool=int(config.get("R2_MAX_POOL", 50)),
+        )
+
+
+@functools.lru_cache(maxsize=1024)
+def _presigned_url(bucket_name, object_key, expiration, time_bucket):
+    s3_client = StorageService._get_r2_client()
+    return s3_client.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": bucket_name, "Key": object_key},
+        ExpiresIn=expiration,
+    )
+
+
+def _is_invalid_range(error):
+    code = error.response.get("Error", {}).get("Code")
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return code == "InvalidRange" or status == 416
+
+
+def _content_range_total(content_range):
+    total = (content_range or "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+class _StreamedBody:
+    """Iterates an R2 object body in chunks and closes it when the response does."""
+
+    def __init__(self, response, chunk_size):
+        self._body = response["Body"]
+        self._chunk_size = chunk_size
+        self.content_length = response.get("ContentLength")
+
+    def __iter__(self):
+        try:
+            yield from self._body.iter_chunks(self._chunk_size)
+        finally:
+            self._body.close()
+
+    def close(self):
+        self._body.close()
+
 
 class StorageService:
-    MAX_RETRIES = 3
-    RETRY_DELAY = 1
+    MAX_RETRIES = 5
+    STREAM_CHUNK_SIZE = 64 * 1024
+    DOWNLOAD_PART_SIZE = 4 * 1024 * 1024
+    DOWNLOAD_CONCURRENCY = 8
+    PROBE_TIMEOUT = 2
+
+    _r2_client = None
+    _r2_probe_client = None
+    _r2_settings = None
+    _r2_client_lock = threading.Lock()
 
     @staticmethod
-    def _retry_with_backoff(func, *args, **kwargs):
-        """Execute function with exponential backoff retry logic."""
-        for attempt in range(StorageService.MAX_RETRIES):
-            try:
-                return func(*args, **kwargs)
-            except (ClientError, EndpointConnectionError) as e:
-                if attempt == StorageService.MAX_RETRIES - 1:
-                    raise
-
-                delay = StorageService.RETRY_DELAY * (2**attempt)
-                logger.warning(
-                    f"R2 operation failed (attempt {attempt + 1}/{StorageService.MAX_RETRIES}): {str(e)}. "
-                    f"Retrying in {delay}s..."
-                )
-                time.sleep(delay)
+    def _get_r2_settings():
+        settings = StorageService._r2_settings
+        if settings is None:
+            settings = _R2Settings.from_config(current_app.config)
+            StorageService._r2_settings = settings
+        return settings
 
     @staticmethod
-    def _get_r2_client():
-        account_id = current_app.config.get("R2_ACCOUNT_ID")
-        access_key = current_app.config.get("R2_ACCESS_KEY_ID")
-        secret_key = current_app.config.get("R2_SECRET_ACCESS_KEY")
-        region = current_app.config.get("R2_REGION", "auto")
+    def _get_configured_r2_settings():
+        settings = StorageService._get_r2_settings()
 
-        if not all([account_id, access_key, secret_key]):
+        if not all(
+            [settings.account_id, settings.access_key_id, settings.secret_access_key]
+        ):
             logger.error("R2 credentials not configured properly")
             raise ValueError("R2 credentials not configured")
 
-        endpoint_url = f"https://{account_id}.r2.cloudflarestorage.com"
+        return settings
+
+    @staticmethod
+    def _new_r2_client(settings, **config_options):
+        import boto3
+        from botocore.client import Config
 
         return boto3.client(
             "s3",
-            endpoint_url=endpoint_url,
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_key,
-            config=Config(signature_version="s3v4"),
-            region_name=region,
+            endpoint_url=f"https://{settings.account_id}.r2.cloudflarestorage.com",
+            aws_access_key_id=settings.access_key_id,
+            aws_secret_access_key=settings.secret_access_key,
+            config=Config(signature_version="s3v4", **config_options),
+            region_name=settings.region,
         )
 
+    @staticmethod
+    def _get_r2_client():
+        if StorageService._r2_client is not None:
+            return StorageService._r2_client
+
+        settings = StorageService._get_configured_r2_settings()
+
+        with StorageService._r2_client_lock:
+            if StorageService._r2_client is None:
+                StorageService._r2_client = StorageService._new_r2_client(
+                    settings,
+                    max_pool_connections=settings.max_pool,
+                    tcp_keepalive=True,
+                    connect_timeout=3,
+                    read_timeout=30,
+                    retries={
+                        "mode": "adaptive",
+                        "max_attempts": StorageService.MAX_RETRIES,
+                    },
+                    request_checksum_calculation="when_required",
+                    response_checksum_validation="when_required",
+                )
+
+            return StorageService._r2_client
+
+    @staticmethod
+    def _get_r2_probe_client():
+        """Client for health checks: short timeouts and a single attempt."""
+        if StorageService._r2_probe_client is not None:
+            return StorageService._r2_probe_client
+
+        settings = StorageService._get_configured_r2_settings()
+
+        with StorageService._r2_client_lock:
+            if StorageService._r2_probe_client is None:
+                StorageService._r2_probe_client = StorageService._new_r2_client(
+                    settings,
+                    connect_timeout=StorageService.PROBE_TIMEOUT,
+                    read_timeout=StorageService.PROBE_TIMEOUT,
+                    retries={"total_max_attempts": 1},
+                )
+
+            return StorageService._r2_probe_client
+
+    @staticmethod
+    def reset_r2_client():
+        """Drop the cached clients and settings, e.g. after forking a worker."""
+        with StorageService._r2_client_lock:
+            StorageService._r2_client = None
+            StorageService._r2_probe_client = None
+            StorageService._r2_settings = None
+        _presigned_url.cache_clear()
+
     @staticmethod
     def save_file(file_storage):
         try:
@@ -72,30 +213,28 @@ class StorageService:
 
             timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
             unique_id = uuid.uuid4().hex[:8]
-            ext = filename.rsplit(".", 1)[1].lower()
+            ext = filename.rpartition(".")[2].lower()
             unique_filename = f"{timestamp}_{unique_id}.{ext}"
 
             object_key = f"images/{unique_filename}"
 
             s3_client = StorageService._get_r2_client()
-            bucket_name = current_app.config.get("R2_BUCKET_NAME", "peek")
+            bucket_name = StorageService._get_r2_settings().bucket
 
             file_storage.seek(0)
 
             logger.info(f"Uploading file to R2: {object_key}")
 
-            def _upload():
-                s3_client.upload_fileobj(
-                    file_storage,
-                    bucket_name,
-                    object_key,
-                    ExtraArgs={
-                        "ContentType": f"image/{ext}",
-                        "CacheControl": "public, max-age=31536000",
-                    },
-                )
-
-            StorageService._retry_with_backoff(_upload)
+            s3_client.upload_fileobj(
+                file_storage,
+                bucket_name,
+                object_key,
+                ExtraArgs={
+                    "ContentType": f"image/{ext}",
+                    "CacheControl": "public, max-age=31536000",
+                },
+                Config=_upload_transfer_config(),
+            )
 
             logger.info(f"Successfully uploaded file to R2: {object_key}")
             return object_key
@@ -111,48 +250,64 @@ class StorageService:
 
     @staticmethod
     def validate_file(file_storage):
+        return StorageService.validate_and_introspect(file_storage)[0]
+
+    @staticmethod
+    def validate_and_introspect(file_storage):
+        """Validate an upload and read its format, size and dimensions in one pass.
+
+        Returns a ``(is_valid, format, (width, height), file_size)`` tuple.
+        """
+        from PIL import Image as PILImage
+
+        invalid = (False, None, (None, None), None)
+
         try:
             allowed_extensions = current_app.config["ALLOWED_EXTENSIONS"]
             max_size = current_app.config["MAX_FILE_SIZE"]
 
             if not validate_file_extension(file_storage.filename, allowed_extensions):
-                return False
+                return invalid
 
-            if not validate_file_size(file_storage, max_size):
-                return False
+            file_size = get_file_size(file_storage)
+            if not validate_file_size(file_storage, max_size, file_size=file_size):
+                return invalid
 
             if not validate_image_content(file_storage):
-                return False
+                return invalid
+
+            # verify() checks structure (e.g. PNG chunk CRCs) without decoding
+            # pixels, so truncated files are refused before they reach R2.
+            try:
+                with PILImage.open(file_storage) as img:
+                    img_format = img.format
+                    dimensions = img.size
+                    img.verify()
+            finally:
+                file_storage.seek(0)
 
-            return True
+            return (True, img_format, dimensions, file_size)
 
         except Exception:
-            return False
+            return invalid
 
     @staticmethod
-    def get_image(image_id):
+    def get_image(image_id, stream=False):
         try:
-            if not isinstance(image_id, int):
-                image_id = int(image_id)
-
             image = db.session.get(Image, image_id)
             if not image:
                 return (None, None)
 
             s3_client = StorageService._get_r2_client()
-            bucket_name = current_app.config.get("R2_BUCKET_NAME", "peek")
+            bucket_name = StorageService._get_r2_settings().bucket
 
             response = s3_client.get_object(Bucket=bucket_name, Key=image.filepath)
-            data = response["Body"].read()
+            if stream:
+                data = _StreamedBody(response, StorageService.STREAM_CHUNK_SIZE)
+            else:
+                data = response["Body"].read()
 
-            mimetype_map = {
-                "JPEG": "image/jpeg",
-                "PNG": "image/png",
-                "GIF": "image/gif",
-                "BMP": "image/bmp",
-                "WEBP": "image/webp",
-            }
-            mimetype = mimetype_map.get(image.format, "application/octet-stream")
+            mimetype = _FORMAT_MIMETYPES.get(image.format, _DEFAULT_MIMETYPE)
 
             return (data, mimetype)
 
@@ -164,61 +319,54 @@ class StorageService:
     @staticmethod
     def get_public_url(image_id, expiration=86400):
         try:
-            if not isinstance(image_id, int):
-                image_id = int(image_id)
-
             image = db.session.get(Image, image_id)
             if not image:
                 return None
 
-            custom_domain = current_app.config.get("R2_PUBLIC_DOMAIN")
-            if custom_domain:
-                return f"{custom_domain.rstrip('/')}/{image.filepath}"
-
-            s3_client = StorageService._get_r2_client()
-            bucket_name = current_app.config.get("R2_BUCKET_NAME", "peek")
+            settings = StorageService._get_r2_settings()
+            if settings.public_domain:
+                return f"{settings.public_domain.rstrip('/')}/{image.filepath}"
 
-            url = s3_client.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": bucket_name, "Key": image.filepath},
-                ExpiresIn=expiration,
+            # Reuse a signed URL while at least 3/4 of its lifetime remains.
+            time_bucket = int(time.time() // max(1, expiration // 4))
+            return _presigned_url(
+                settings.bucket, image.filepath, expiration, time_bucket
             )
-            return url
 
         except Exception:
             return None
 
     @staticmethod
-    def get_annotated_image(image_id):
+    def get_annotated_image(image_id, stream=False):
         try:
-            if not isinstance(image_id, int):
-                image_id = int(image_id)
-
             image = db.session.get(Image, image_id)
             if not image:
                 return (None, None)
 
-            base_key = image.filepath.rsplit(".", 1)[0]
-            ext = image.filepath.rsplit(".", 1)[1]
+            # Annotations are only written for processed images with faces, so
+            # serve everything else without probing R2 for a missing object.
+            if not image.processed or not any(
+                insights.faces_detected for insights in image.insights
+            ):
+                return StorageService.get_image(image_id, stream=stream)
+
+            base_key, _, ext = image.filepath.rpartition(".")
             annotated_key = f"{base_key}_annotated.{ext}"
 
             s3_client = StorageService._get_r2_client()
-            bucket_name = current_app.config.get("R2_BUCKET_NAME", "peek")
+            bucket_name = StorageService._get_r2_settings().bucket
 
             try:
                 response = s3_client.get_object(Bucket=bucket_name, Key=annotated_key)
-                data = response["Body"].read()
             except ClientError:
-                return StorageService.get_image(image_id)
+                return StorageService.get_image(image_id, stream=stream)
+
+            if stream:
+                data = _StreamedBody(response, StorageService.STREAM_CHUNK_SIZE)
+            else:
+                data = response["Body"].read()
 
-            mimetype_map = {
-                "JPEG": "image/jpeg",
-                "PNG": "image/png",
-                "GIF": "image/gif",
-                "BMP": "image/bmp",
-                "WEBP": "image/webp",
-            }
-            mimetype = mimetype_map.get(image.format, "application/octet-stream")
+            mimetype = _FORMAT_MIMETYPES.get(image.format, _DEFAULT_MIMETYPE)
 
             return (data, mimetype)
 
@@ -229,7 +377,7 @@ class StorageService:
     def upload_file_to_r2(file_data, object_key, content_type="image/jpeg"):
         try:
             s3_client = StorageService._get_r2_client()
-            bucket_name = current_app.config.get("R2_BUCKET_NAME", "peek")
+            bucket_name = StorageService._get_r2_settings().bucket
 
             if isinstance(file_data, str):
                 with open(file_data, "rb") as f:
@@ -241,6 +389,7 @@ class StorageService:
                             "ContentType": content_type,
                             "CacheControl": "public, max-age=31536000",
                         },
+                        Config=_upload_transfer_config(),
                     )
             else:
                 file_obj = (
@@ -254,6 +403,7 @@ class StorageService:
                         "ContentType": content_type,
                         "CacheControl": "public, max-age=31536000",
                     },
+                    Config=_upload_transfer_config(),
                 )
 
             return object_key
@@ -267,10 +417,37 @@ class StorageService:
     def download_from_r2(object_key):
         try:
             s3_client = StorageService._get_r2_client()
-            bucket_name = current_app.config.get("R2_BUCKET_NAME", "peek")
+            bucket_name = StorageService._get_r2_settings().bucket
+
+            part_size = StorageService.DOWNLOAD_PART_SIZE
+
+            def read_range(start):
+                end = start + part_size - 1
+                response = s3_client.get_object(
+                    Bucket=bucket_name, Key=object_key, Range=f"bytes={start}-{end}"
+                )
+                return response, response["Body"].read()
 
-            response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
-            return response["Body"].read()
+            # The first ranged GET doubles as the size probe, so objects that fit
+            # in one part still cost a single request.
+            try:
+                response, first_part = read_range(0)
+            except ClientError as e:
+                # R2 rejects any range on an empty object with 416 InvalidRange.
+                if _is_invalid_range(e):
+                    return b""
+                raise
+            total_size = _content_range_total(response.get("ContentRange"))
+            if total_size is None or total_size <= len(first_part):
+                return first_part
+
+            starts = range(len(first_part), total_size, part_size)
+            with ThreadPoolExecutor(
+                max_workers=StorageService.DOWNLOAD_CONCURRENCY
+            ) as executor:
+                parts = [data for _, data in executor.map(read_range, starts)]
+
+            return b"".join([first_part, *parts])
 
         except ClientError as e:
             raise IOError(f"Failed to download from R2: {str(e)}")
@@ -279,6 +456,8 @@ class StorageService:
 
     @staticmethod
     def get_image_dimensions(file_storage_or_data):
+        from PIL import Image as PILImage
+
         try:
             if hasattr(file_storage_or_data, "seek"):
                 file_storage_or_data.seek(0)
@@ -294,6 +473,8 @@ class StorageService:
 
     @staticmethod
     def get_image_format(file_storage_or_data):
+        from PIL import Image as PILImage
+
         try:
             if hasattr(file_storage_or_data, "seek"):
                 file_storage_or_data.seek(0)
@@ -1,6 +1,20 @@
 import os
 
-from PIL import Image as PILImage
+_PATH_SEPARATORS = str.maketrans("", "", "/\\")
+
+_IMAGE_SIGNATURES = (
+    b"\xff\xd8\xff",
+    b"\x89PNG\r\n\x1a\n",
+    b"GIF87a",
+    b"GIF89a",
+    b"BM",
+)
+
+
+def _has_image_signature(header):
+    if header.startswith(_IMAGE_SIGNATURES):
+        return True
+    return header[:4] == b"RIFF" and header[8:12] == b"WEBP"
 
 
 def validate_file_extension(filename, allowed_extensions):
@@ -10,28 +24,31 @@ def validate_file_extension(filename, allowed_extensions):
     if "." not in filename:
         return False
 
-    ext = filename.rsplit(".", 1)[1].lower()
+    ext = filename.rpartition(".")[2].lower()
     return ext in allowed_extensions
 
 
-def validate_file_size(file_storage, max_size):
+def get_file_size(file_storage):
     file_storage.seek(0, os.SEEK_END)
     file_size = file_storage.tell()
     file_storage.seek(0)
+    return file_size
+
 
+def validate_file_size(file_storage, max_size, file_size=None):
+    if file_storage.content_length > max_size:
+        return False
+
+    if file_size is None:
+        file_size = get_file_size(file_storage)
     return file_size <= max_size
 
 
 def validate_image_content(file_storage):
-    try:
-        file_storage.seek(0)
-        img = PILImage.open(file_storage)
-        img.verify()
-        file_storage.seek(0)
-        return True
-    except Exception:
-        file_storage.seek(0)
-        return False
+    file_storage.seek(0)
+    header = file_storage.read(12)
+    file_storage.seek(0)
+    return _has_image_signature(header)
 
 
 def sanitize_filename(filename):
@@ -46,10 +63,7 @@ def sanitize_filename(filename):
     if not filename or not filename.strip():
         raise ValueError("Invalid filename after sanitization")
 
-    invalid_chars = ["..", "/", "\\"]
-    for char in invalid_chars:
-        if char in filename:
-            filename = filename.replace(char, "")
+    filename = filename.translate(_PATH_SEPARATORS).replace("..", "")
 
     if not filename or not filename.strip():
         raise ValueError("Filename contains only invalid characters")
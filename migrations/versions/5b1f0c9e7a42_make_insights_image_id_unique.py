@@ -0,0 +1,37 @@
+"""make insights.image_id unique
+
+Revision ID: 5b1f0c9e7a42
+Revises: 2779222aa63b
+Create Date: 2026-10-15 11:02:13.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f0c9e7a42'
+down_revision: Union[str, Sequence[str], None] = '2779222aa63b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the newest insights row per image before enforcing uniqueness.
+    op.execute(
+        sa.text(
+            "DELETE FROM insights WHERE id NOT IN "
+            "(SELECT MAX(id) FROM insights GROUP BY image_id)"
+        )
+    )
+    op.drop_index(op.f('ix_insights_image_id'), table_name='insights')
+    op.create_index(op.f('ix_insights_image_id'), 'insights', ['image_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_insights_image_id'), table_name='insights')
+    op.create_index(op.f('ix_insights_image_id'), 'insights', ['image_id'], unique=False)
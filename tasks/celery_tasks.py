@@ -1,38 +1,53 @@
+import functools
+import logging
 import os
 import tempfile
 
 from celery import Celery
-from flask import Flask
+from celery.signals import worker_process_init
+from flask import Config as FlaskConfig
+from flask import has_app_context
+from sqlalchemy.dialects import postgresql, sqlite
 
-from app import db
+from app import create_app, db
 from app.models import Image, Insights
 from app.services.annotation_service import AnnotationService
 from app.services.cv_service import CVService
 from app.services.storage_service import StorageService
 from config import config_by_name
 
+logger = logging.getLogger(__name__)
+
 
 def make_celery(app=None):
+    config_name = os.environ.get("FLASK_ENV", "development")
+
     if app is None:
-        app = Flask(__name__)
-        config_name = os.environ.get("FLASK_ENV", "development")
-        app.config.from_object(config_by_name[config_name])
+        settings = FlaskConfig(os.getcwd())
+        settings.from_object(config_by_name[config_name])
+    else:
+        settings = app.config
 
-        with app.app_context():
-            db.init_app(app)
+    # The Flask app (and its DB engine) is only built once a task actually runs,
+    # so processes that merely import this module to enqueue work stay cheap.
+    @functools.lru_cache(maxsize=1)
+    def get_flask_app():
+        return app if app is not None else create_app(config_name)
 
     celery = Celery(
-        app.import_name,
-        broker=app.config["CELERY_BROKER_URL"],
-        backend=app.config["CELERY_RESULT_BACKEND"],
+        __name__,
+        broker=settings["CELERY_BROKER_URL"],
+        backend=settings["CELERY_RESULT_BACKEND"],
     )
 
-    celery.conf.update(app.config)
-    celery.flask_app = app
+    celery.conf.update(settings)
 
     class ContextTask(celery.Task):
         def __call__(self, *args, **kwargs):
-            with app.app_context():
+            if has_app_context():
+                return self.run(*args, **kwargs)
+
+            with get_flask_app().app_context():
                 return self.run(*args, **kwargs)
 
     celery.Task = ContextTask
@@ -42,53 +57,90 @@ def make_celery(app=None):
 celery = make_celery()
 
 
-@celery.task(name="tasks.celery_tasks.process_image_async")
-def process_image_async(image_id):
-    image = db.session.get(Image, image_id)
+@worker_process_init.connect
+def reset_storage_client(**kwargs):
+    StorageService.reset_r2_client()
+
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _upsert_insights(image_id, insights_data):
+    Insights.validate_values(insights_data)
+
+    insert = _DIALECT_INSERTS[db.session.get_bind().dialect.name]
+    stmt = (
+        insert(Insights)
+        .values(image_id=image_id, **insights_data)
+        .on_conflict_do_update(index_elements=["image_id"], set_=insights_data)
+    )
+    db.session.execute(stmt)
+
+
+def _download_to_tempfile(filepath):
+    image_data = StorageService.download_from_r2(filepath)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
+        temp_file.write(image_data)
+        return temp_file.name
+
+
+def _remove_tempfile(temp_file_path):
+    if temp_file_path and os.path.exists(temp_file_path):
+        os.remove(temp_file_path)
 
-    if not image:
-        return {"error": "Image not found"}
 
+def _analyze_image(image):
     temp_file_path = None
     try:
-        image_data = StorageService.download_from_r2(image.filepath)
+        temp_file_path = _download_to_tempfile(image.filepath)
+        insights_data = CVService.process_image(temp_file_path)
+    finally:
+        _remove_tempfile(temp_file_path)
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-            temp_file.write(image_data)
-            temp_file_path = temp_file.name
+    image.processed = True
 
-        insights_data = CVService.process_image(temp_file_path)
+    if "error" in insights_data:
+        return {"error": insights_data["error"]}, None
 
-        if "error" in insights_data:
-            image.processed = True
-            db.session.commit()
-            return {"error": insights_data["error"]}
+    _upsert_insights(image.id, insights_data)
 
-        existing_insights = (
-            db.session.query(Insights).filter_by(image_id=image_id).first()
-        )
+    annotation = None
+    if insights_data.get("faces_detected", 0) > 0:
+        face_locations = insights_data.get("face_locations", [])
+        annotation = (image.filepath, face_locations)
 
-        if existing_insights:
-            for key, value in insights_data.items():
-                setattr(existing_insights, key, value)
-        else:
-            insights = Insights(image_id=image_id, **insights_data)
-            db.session.add(insights)
-
-        image.processed = True
-        db.session.commit()
-
-        if insights_data.get("faces_detected", 0) > 0:
-            try:
-                face_locations = insights_data.get("face_locations", [])
-                AnnotationService.create_annotated_image(
-                    image.filepath, face_locations, storage_service=StorageService
-                )
-            except Exception:
-                pass
+    return {"image_id": image.id, "status": "completed"}, annotation
 
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
 
-    return {"image_id": image_id, "status": "completed"}
+def _annotate(annotation):
+    if annotation is not None:
+        annotate_image_async.delay(*annotation)
+
+
+@celery.task(name="tasks.celery_tasks.process_image_async")
+def process_image_async(image_id):
+    image = db.session.get(Image, image_id)
+
+    if not image:
+        return {"error": "Image not found"}
+
+    result, annotation = _analyze_image(image)
+    db.session.commit()
+
+    _annotate(annotation)
+    return result
+
+
+@celery.task(bind=True, name="tasks.celery_tasks.annotate_image_async", max_retries=3)
+def annotate_image_async(self, filepath, face_locations):
+    try:
+        return AnnotationService.create_annotated_image(
+            filepath, face_locations, storage_service=StorageService
+        )
+    except OSError as e:
+        logger.warning(f"Annotation failed for {filepath}, retrying: {str(e)}")
+        raise self.retry(exc=e, countdown=2**self.request.retries)
+    except ValueError as e:
+        logger.error(f"Annotation failed for {filepath}: {str(e)}")
+        raise
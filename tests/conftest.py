@@ -1,20 +1,64 @@
+import functools
 from io import BytesIO
 
 import pytest
 from PIL import Image
+from sqlalchemy import event
 
 from app import create_app, db
+from app.services.storage_service import StorageService
 
 
-@pytest.fixture
-def app():
+def _enable_sqlite_savepoints(engine):
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+
+@pytest.fixture(scope="session")
+def _app():
     app = create_app("testing")
 
     with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            _enable_sqlite_savepoints(db.engine)
+
+        # Tables are created but never dropped: xdist workers may share an
+        # external test database whose schema is owned by the migrations.
         db.create_all()
+        db.session.configure(join_transaction_mode="create_savepoint")
         yield app
         db.session.remove()
-        db.drop_all()
+
+
+@pytest.fixture
+def app(_app):
+    config = dict(_app.config)
+    engines = db.engines
+    engine = engines[None]
+    connection = engine.connect()
+    transaction = connection.begin()
+    engines[None] = connection
+
+    yield _app
+
+    db.session.remove()
+    engines[None] = engine
+    transaction.rollback()
+    connection.close()
+    _app.config.clear()
+    _app.config.update(config)
+
+
+@pytest.fixture(autouse=True)
+def reset_r2_client():
+    StorageService.reset_r2_client()
+    yield
+    StorageService.reset_r2_client()
 
 
 @pytest.fixture
@@ -27,31 +71,33 @@ def runner(app):
     return app.test_cli_runner()
 
 
+@functools.lru_cache(maxsize=None)
+def _encoded(size, color, format, quality=None):
+    img = Image.new("RGB", size, color=color)
+    img_bytes = BytesIO()
+    save_kwargs = {"quality": quality} if quality else {}
+    img.save(img_bytes, format=format, **save_kwargs)
+    return img_bytes.getvalue()
+
+
 @pytest.fixture
 def sample_image():
-    img = Image.new("RGB", (100, 100), color="red")
-    img_bytes = BytesIO()
-    img.save(img_bytes, format="JPEG")
-    img_bytes.seek(0)
-    return img_bytes
+    return BytesIO(_encoded((100, 100), "red", "JPEG"))
+
+
+@pytest.fixture
+def sample_png():
+    return BytesIO(_encoded((100, 100), "blue", "PNG"))
 
 
 @pytest.fixture
 def sample_image_with_text():
-    img = Image.new("RGB", (200, 100), color="white")
-    img_bytes = BytesIO()
-    img.save(img_bytes, format="PNG")
-    img_bytes.seek(0)
-    return img_bytes
+    return BytesIO(_encoded((200, 100), "white", "PNG"))
 
 
 @pytest.fixture
 def large_image():
-    img = Image.new("RGB", (5000, 5000), color="blue")
-    img_bytes = BytesIO()
-    img.save(img_bytes, format="JPEG", quality=95)
-    img_bytes.seek(0)
-    return img_bytes
+    return BytesIO(_encoded((5000, 5000), "blue", "JPEG", quality=95))
 
 
 @pytest.fixture
@@ -1,105 +1,123 @@
 import numpy as np
-from PIL import Image
+import pytest
+
+
+def _solid(height, width, bgr):
+    return np.full((height, width, 3), bgr, dtype=np.uint8)
+
+
+# OpenCV decodes to BGR, so the samples are built in that channel order.
+SAMPLES = {
+    "red": _solid(100, 100, (0, 0, 255)),
+    "white": _solid(100, 100, (255, 255, 255)),
+    "blue": _solid(100, 100, (255, 0, 0)),
+    "green": _solid(100, 100, (0, 128, 0)),
+    "yellow": _solid(100, 100, (0, 255, 255)),
+    "skyblue": _solid(200, 300, (235, 206, 135)),
+    "white_wide": _solid(100, 200, (255, 255, 255)),
+}
 
 
 class TestColorAnalyzer:
-    def test_analyze_returns_dominant_colors(self):
+    @pytest.mark.parametrize(
+        "sample, expected_hex, expected_brightness",
+        [("red", "#ff0000", 76), ("white", "#ffffff", 255), ("blue", "#0000ff", 29)],
+    )
+    def test_analyze_returns_dominant_colors(
+        self, sample, expected_hex, expected_brightness
+    ):
         from app.analyzers.color_analyzer import ColorAnalyzer
 
-        img = Image.new("RGB", (100, 100), color="red")
-        img_array = np.array(img)
+        result = ColorAnalyzer.analyze(SAMPLES[sample])
 
-        result = ColorAnalyzer.analyze(img_array)
+        assert set(result["dominant_colors"]) == {expected_hex}
+        assert result["brightness"] == expected_brightness
 
-        assert "dominant_colors" in result
-        assert "brightness" in result
-        assert isinstance(result["dominant_colors"], list)
-        assert isinstance(result["brightness"], (int, float))
+    def test_analyze_with_precomputed_gray(self):
+        import cv2
 
-    def test_analyze_brightness_range(self):
         from app.analyzers.color_analyzer import ColorAnalyzer
 
-        img = Image.new("RGB", (100, 100), color="white")
-        img_array = np.array(img)
+        img_array = SAMPLES["white"]
+        gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
 
-        result = ColorAnalyzer.analyze(img_array)
+        result = ColorAnalyzer.analyze(img_array, gray=gray)
 
-        assert 0 <= result["brightness"] <= 255
+        assert result == ColorAnalyzer.analyze(img_array)
 
 
 class TestFaceDetector:
-    def test_detect_faces_returns_count(self):
+    @pytest.mark.parametrize("sample", ["white", "blue"])
+    def test_detect_no_faces(self, sample):
         from app.analyzers.face_detector import FaceDetector
 
-        img = Image.new("RGB", (200, 200), color="white")
-        img_array = np.array(img)
+        result = FaceDetector.detect(SAMPLES[sample])
 
-        result = FaceDetector.detect(img_array)
+        assert result["faces_detected"] == 0
+        assert result["face_locations"] == []
 
-        assert "faces_detected" in result
-        assert "face_locations" in result
-        assert isinstance(result["faces_detected"], int)
-        assert isinstance(result["face_locations"], list)
+    def test_detect_uses_dnn_when_model_configured(self):
+        from unittest.mock import MagicMock, patch
 
-    def test_detect_no_faces(self):
         from app.analyzers.face_detector import FaceDetector
 
-        img = Image.new("RGB", (100, 100), color="blue")
-        img_array = np.array(img)
+        img_array = np.zeros((200, 400, 3), dtype=np.uint8)
+        detections = np.zeros((1, 1, 2, 7), dtype=np.float32)
+        detections[0, 0, 0] = [0, 1, 0.9, 0.25, 0.25, 0.5, 0.75]
+        detections[0, 0, 1] = [0, 1, 0.1, 0.0, 0.0, 1.0, 1.0]
+        mock_net = MagicMock()
+        mock_net.forward.return_value = detections
 
-        result = FaceDetector.detect(img_array)
+        with patch("app.analyzers.face_detector._get_face_net", return_value=mock_net):
+            result = FaceDetector.detect(img_array)
 
-        assert result["faces_detected"] == 0
-        assert result["face_locations"] == []
+        assert result["faces_detected"] == 1
+        assert result["face_locations"] == [
+            {"x": 100, "y": 50, "width": 100, "height": 100}
+        ]
 
+    def test_missing_dnn_model_is_only_probed_once(self, tmp_path):
+        from unittest.mock import patch
 
-class TestQualityAnalyzer:
-    def test_analyze_returns_quality_metrics(self):
-        from app.analyzers.quality_analyzer import QualityAnalyzer
+        from app.analyzers.face_detector import FaceDetector
 
-        img = Image.new("RGB", (100, 100), color="green")
-        img_array = np.array(img)
+        FaceDetector.configure_dnn(
+            str(tmp_path / "deploy.prototxt"), str(tmp_path / "model.caffemodel")
+        )
+        try:
+            with patch(
+                "app.analyzers.face_detector._model_files_exist", return_value=False
+            ) as exists:
+                FaceDetector.detect(SAMPLES["white"])
+                FaceDetector.detect(SAMPLES["white"])
 
-        result = QualityAnalyzer.analyze(img_array)
+            exists.assert_called_once()
+        finally:
+            FaceDetector.configure_dnn(None, None)
 
-        assert "sharpness_score" in result
-        assert "blur_level" in result
-        assert "contrast_score" in result
-        assert "quality_score" in result
 
-    def test_quality_score_in_range(self):
+class TestQualityAnalyzer:
+    @pytest.mark.parametrize("sample", ["green", "yellow"])
+    def test_analyze_returns_quality_metrics(self, sample):
         from app.analyzers.quality_analyzer import QualityAnalyzer
 
-        img = Image.new("RGB", (100, 100), color="yellow")
-        img_array = np.array(img)
-
-        result = QualityAnalyzer.analyze(img_array)
+        result = QualityAnalyzer.analyze(SAMPLES[sample])
 
+        assert "sharpness_score" in result
+        assert "blur_level" in result
+        assert "contrast_score" in result
         assert 0 <= result["quality_score"] <= 100
 
 
 class TestSceneDetector:
-    def test_detect_scene_returns_type(self):
+    @pytest.mark.parametrize("sample", ["skyblue", "green"])
+    def test_detect_scene_returns_type(self, sample):
         from app.analyzers.scene_detector import SceneDetector
 
-        img = Image.new("RGB", (300, 200), color="skyblue")
-        img_array = np.array(img)
+        result = SceneDetector.detect(SAMPLES[sample])
 
-        result = SceneDetector.detect(img_array)
-
-        assert "scene_type" in result
-        assert "scene_confidence" in result
         assert isinstance(result["scene_type"], str)
         assert isinstance(result["scene_confidence"], float)
-
-    def test_scene_confidence_in_range(self):
-        from app.analyzers.scene_detector import SceneDetector
-
-        img = Image.new("RGB", (200, 200), color="green")
-        img_array = np.array(img)
-
-        result = SceneDetector.detect(img_array)
-
         assert 0.0 <= result["scene_confidence"] <= 1.0
 
 
@@ -107,8 +125,7 @@ class TestTextExtractor:
     def test_extract_text_returns_result(self):
         from app.analyzers.text_extractor import TextExtractor
 
-        img = Image.new("RGB", (200, 100), color="white")
-        img_array = np.array(img)
+        img_array = SAMPLES["white_wide"]
 
         result = TextExtractor.extract(img_array)
 
@@ -117,3 +134,35 @@ class TestTextExtractor:
         assert "word_count" in result
         assert isinstance(result["text_found"], bool)
         assert isinstance(result["word_count"], int)
+
+    def test_extract_skips_ocr_on_low_edge_density(self):
+        from unittest.mock import patch
+
+        from app.analyzers.text_extractor import TextExtractor
+
+        img_array = SAMPLES["white_wide"]
+
+        with patch("app.analyzers.text_extractor._ocr") as mock_ocr:
+            result = TextExtractor.extract(img_array)
+
+        mock_ocr.assert_not_called()
+        assert result == {"text_found": False, "extracted_text": "", "word_count": 0}
+
+    def test_extract_runs_ocr_on_text_like_image(self):
+        from unittest.mock import patch
+
+        import cv2
+
+        from app.analyzers.text_extractor import TextExtractor
+
+        img_array = np.full((200, 600, 3), 255, dtype=np.uint8)
+        cv2.putText(
+            img_array, "Hello World", (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3
+        )
+
+        with patch("app.analyzers.text_extractor._ocr") as mock_ocr:
+            mock_ocr.return_value = "Hello World\n"
+            result = TextExtractor.extract(img_array)
+
+        mock_ocr.assert_called_once()
+        assert result["word_count"] == 2
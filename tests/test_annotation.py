@@ -56,3 +56,23 @@ class TestAnnotationService:
 
         assert annotated_path.endswith(".png")
         assert os.path.exists(annotated_path)
+
+    def test_create_annotated_image_uploads_jpeg_to_storage(self):
+        from io import BytesIO
+        from unittest.mock import MagicMock
+
+        img_bytes = BytesIO()
+        Image.new("RGB", (100, 100), color="white").save(img_bytes, format="PNG")
+        storage_service = MagicMock()
+        storage_service.download_from_r2.return_value = img_bytes.getvalue()
+
+        annotated_key = AnnotationService.create_annotated_image(
+            "images/photo.jpg",
+            [{"x": 10, "y": 10, "width": 50, "height": 50}],
+            storage_service=storage_service,
+        )
+
+        assert annotated_key == "images/photo_annotated.jpg"
+        storage_service.download_from_r2.assert_called_once_with("images/photo.jpg")
+        uploaded_data = storage_service.upload_file_to_r2.call_args[0][0]
+        assert uploaded_data.startswith(b"\xff\xd8\xff")
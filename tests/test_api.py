@@ -1,19 +1,50 @@
+from io import BytesIO
 from unittest.mock import MagicMock, patch
 
+import pytest
+
+
+def _mock(monkeypatch, target):
+    mock = MagicMock()
+    monkeypatch.setattr(target, mock)
+    return mock
+
+
+@pytest.fixture
+def mock_validate(monkeypatch):
+    return _mock(monkeypatch, "app.routes.api.StorageService.validate_and_introspect")
+
+
+@pytest.fixture
+def mock_get_analysis_results(monkeypatch):
+    return _mock(monkeypatch, "app.routes.api.ImageService.get_analysis_results")
+
+
+@pytest.fixture
+def mock_get_image(monkeypatch):
+    return _mock(monkeypatch, "app.routes.api.StorageService.get_image")
+
+
+@pytest.fixture
+def mock_get_annotated_image(monkeypatch):
+    return _mock(monkeypatch, "app.routes.api.StorageService.get_annotated_image")
+
 
 class TestHealthEndpoint:
     def test_health_check_returns_ok(self, client):
         response = client.get("/api/health")
         assert response.status_code == 200
-        assert response.json["status"] == "ok"
-        assert "database" in response.json
-        assert "redis" in response.json
+        data = response.json
+        assert data["status"] == "ok"
+        assert "database" in data
+        assert "redis" in data
+        assert "storage" in data
 
 
 class TestImageUpload:
     @patch("tasks.celery_tasks.process_image_async")
     @patch("app.services.storage_service.StorageService.get_public_url")
-    @patch("app.services.storage_service.boto3.client")
+    @patch("boto3.client")
     def test_upload_image_success(
         self,
         mock_boto_client,
@@ -59,17 +90,33 @@ class TestImageUpload:
         assert response.status_code == 400
         assert "error" in response.json
 
-    def test_upload_file_too_large_fails(self, client, large_image):
-        with patch(
-            "app.services.storage_service.StorageService.validate_file"
-        ) as mock_validate:
-            mock_validate.return_value = False
-            response = client.post(
-                "/api/analyze",
-                data={"image": (large_image, "large.jpg")},
-                content_type="multipart/form-data",
-            )
-            assert response.status_code == 400
+    def test_upload_non_image_with_image_extension_fails(self, client):
+        response = client.post(
+            "/api/analyze",
+            data={"image": (BytesIO(b"not an image at all"), "fake.png")},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 400
+        assert "error" in response.json
+
+    def test_upload_file_too_large_fails(self, client, large_image, mock_validate):
+        mock_validate.return_value = (False, None, (None, None), None)
+        response = client.post(
+            "/api/analyze",
+            data={"image": (large_image, "large.jpg")},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 400
+
+    def test_upload_request_body_too_large_rejected(self, app, client):
+        app.config["MAX_CONTENT_LENGTH"] = 1024
+        response = client.post(
+            "/api/analyze",
+            data={"image": (BytesIO(b"a" * 4096), "large.jpg")},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 413
+        assert response.json == {"error": "File too large"}
 
 
 class TestResultsRetrieval:
@@ -77,48 +124,72 @@ class TestResultsRetrieval:
         response = client.get("/api/results/1")
         assert response.status_code in [200, 202, 404]
 
-    def test_get_results_completed(self, client):
-        with patch("app.routes.api.ImageService.get_analysis_results") as mock_service:
-            mock_service.return_value = {
-                "id": 1,
-                "status": "completed",
-                "insights": {
-                    "dominant_colors": ["#FF0000", "#00FF00"],
-                    "brightness": 128,
-                    "faces_detected": 2,
-                    "quality_score": 85,
-                },
-            }
-            response = client.get("/api/results/1")
-            assert response.status_code == 200
-            data = response.json
-            assert data["status"] == "completed"
-            assert "insights" in data
-
-    def test_get_results_not_found(self, client):
-        with patch("app.routes.api.ImageService.get_analysis_results") as mock_service:
-            mock_service.return_value = None
-            response = client.get("/api/results/999")
-            assert response.status_code == 404
+    def test_get_results_completed(self, client, mock_get_analysis_results):
+        mock_get_analysis_results.return_value = {
+            "id": 1,
+            "status": "completed",
+            "insights": {
+                "dominant_colors": ["#FF0000", "#00FF00"],
+                "brightness": 128,
+                "faces_detected": 2,
+                "quality_score": 85,
+            },
+        }
+        response = client.get("/api/results/1")
+        assert response.status_code == 200
+        data = response.json
+        assert data["status"] == "completed"
+        assert "insights" in data
+
+    def test_get_results_not_found(self, client, mock_get_analysis_results):
+        mock_get_analysis_results.return_value = None
+        response = client.get("/api/results/999")
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize(
+        "path", ["/api/results/abc", "/api/image/abc/original", "/api/image/1.5/url"]
+    )
+    def test_non_integer_id_is_not_routed(self, client, path):
+        assert client.get(path).status_code == 404
+
+    def test_service_value_error_is_a_server_error(
+        self, client, mock_get_analysis_results
+    ):
+        mock_get_analysis_results.side_effect = ValueError("boom")
+        response = client.get("/api/results/1")
+        assert response.status_code == 500
+        assert response.json == {"error": "Internal server error"}
 
 
 class TestImageRetrieval:
-    def test_get_original_image(self, client):
-        with patch("app.routes.api.StorageService.get_image") as mock_storage:
-            mock_storage.return_value = (b"fake_image_data", "image/jpeg")
-            response = client.get("/api/image/1/original")
-            assert response.status_code == 200
-            assert response.content_type == "image/jpeg"
-
-    def test_get_original_image_not_found(self, client):
-        with patch("app.routes.api.StorageService.get_image") as mock_storage:
-            mock_storage.return_value = (None, None)
-            response = client.get("/api/image/999/original")
-            assert response.status_code == 404
-
-    def test_get_annotated_image(self, client):
-        with patch("app.routes.api.StorageService.get_annotated_image") as mock_storage:
-            mock_storage.return_value = (b"fake_annotated_data", "image/jpeg")
-            response = client.get("/api/image/1/annotated")
-            assert response.status_code == 200
-            assert response.content_type == "image/jpeg"
+    def test_get_original_image(self, client, mock_get_image):
+        mock_get_image.return_value = (b"fake_image_data", "image/jpeg")
+        response = client.get("/api/image/1/original")
+        assert response.status_code == 200
+        assert response.content_type == "image/jpeg"
+
+    def test_get_original_image_streams_and_closes_body(self, client, mock_get_image):
+        from app.services.storage_service import _StreamedBody
+
+        body = MagicMock()
+        body.iter_chunks.return_value = iter([b"abc", b"def"])
+        stream = _StreamedBody({"Body": body, "ContentLength": 6}, 3)
+        mock_get_image.return_value = (stream, "image/png")
+
+        response = client.get("/api/image/1/original")
+        assert response.status_code == 200
+        assert response.content_length == 6
+        assert response.data == b"abcdef"
+        response.close()
+        body.close.assert_called()
+
+    def test_get_original_image_not_found(self, client, mock_get_image):
+        mock_get_image.return_value = (None, None)
+        response = client.get("/api/image/999/original")
+        assert response.status_code == 404
+
+    def test_get_annotated_image(self, client, mock_get_annotated_image):
+        mock_get_annotated_image.return_value = (b"fake_annotated_data", "image/jpeg")
+        response = client.get("/api/image/1/annotated")
+        assert response.status_code == 200
+        assert response.content_type == "image/jpeg"
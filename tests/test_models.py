@@ -58,58 +58,43 @@ class TestImageModel:
             with pytest.raises(Exception):
                 db.session.commit()
 
-    def test_filename_max_length(self, app):
-        with app.app_context():
-            long_filename = "a" * 256
-
-            with pytest.raises(ValueError):
-                Image(
-                    filename=long_filename, filepath="/uploads/long.jpg"
-                )  # noqa: F841
+    def test_filename_max_length(self):
+        with pytest.raises(ValueError, match="maximum length"):
+            Image(filename="a" * 256, filepath="/uploads/long.jpg")
 
 
 class TestImageModelSecurity:
-    def test_path_traversal_prevention(self, app):
-        with app.app_context():
-            with pytest.raises(ValueError):
-                Image(
-                    filename="test.jpg", filepath="/uploads/../../../etc/passwd"
-                )  # noqa: F841
-
-    def test_filename_sanitization(self, app):
-        with app.app_context():
-            image = Image(filename="../../etc/passwd", filepath="/uploads/safe.jpg")
-            assert image.filename == "passwd"
-            assert ".." not in image.filename
-
-    def test_null_byte_injection_prevention(self, app):
-        with app.app_context():
-            with pytest.raises(ValueError):
-                Image(
-                    filename="test\x00.jpg", filepath="/uploads/test.jpg"
-                )  # noqa: F841
-
-    def test_error_message_sanitization(self, app):
-        with app.app_context():
-            error_with_traceback = (
-                'Traceback (most recent call last): File "test.py", line 10'
-            )
-            image = Image(
-                filename="test.jpg",
-                filepath="/uploads/error.jpg",
-                error_message=error_with_traceback,
-            )
-            assert image.error_message == "Processing error occurred"
-
-    def test_error_message_truncation(self, app):
-        with app.app_context():
-            long_error = "A" * 2000
-            image = Image(
-                filename="test.jpg",
-                filepath="/uploads/error_long.jpg",
-                error_message=long_error,
-            )
-            assert len(image.error_message) <= 1000
+    def test_path_traversal_prevention(self):
+        with pytest.raises(ValueError, match="Path traversal"):
+            Image(filename="test.jpg", filepath="/uploads/../../../etc/passwd")
+
+    def test_filename_sanitization(self):
+        image = Image(filename="../../etc/passwd", filepath="/uploads/safe.jpg")
+        assert image.filename == "passwd"
+        assert ".." not in image.filename
+
+    def test_null_byte_injection_prevention(self):
+        with pytest.raises(ValueError, match="Invalid character"):
+            Image(filename="test\x00.jpg", filepath="/uploads/test.jpg")
+
+    def test_error_message_sanitization(self):
+        error_with_traceback = (
+            'Traceback (most recent call last): File "test.py", line 10'
+        )
+        image = Image(
+            filename="test.jpg",
+            filepath="/uploads/error.jpg",
+            error_message=error_with_traceback,
+        )
+        assert image.error_message == "Processing error occurred"
+
+    def test_error_message_truncation(self):
+        image = Image(
+            filename="test.jpg",
+            filepath="/uploads/error_long.jpg",
+            error_message="A" * 2000,
+        )
+        assert len(image.error_message) <= 1000
 
 
 class TestInsightsModel:
@@ -199,58 +184,44 @@ class TestInsightsModel:
             assert image.insights[0].brightness == 128
             assert insights.image.filename == "test.jpg"
 
+    def test_one_insights_row_per_image(self, app):
+        from sqlalchemy.exc import IntegrityError
 
-class TestInsightsModelValidation:
-    def test_brightness_validation_max(self, app):
         with app.app_context():
-            image = Image(filename="test.jpg", filepath="/uploads/brightness_max.jpg")
+            image = Image(filename="test.jpg", filepath="/uploads/unique_insights.jpg")
             db.session.add(image)
             db.session.commit()
 
-            with pytest.raises(ValueError):
-                Insights(image_id=image.id, brightness=256)  # noqa: F841
-
-    def test_brightness_validation_min(self, app):
-        with app.app_context():
-            image = Image(filename="test.jpg", filepath="/uploads/brightness_min.jpg")
-            db.session.add(image)
+            db.session.add(Insights(image_id=image.id, brightness=100))
             db.session.commit()
 
-            with pytest.raises(ValueError):
-                Insights(image_id=image.id, brightness=-1)  # noqa: F841
-
-    def test_quality_score_validation_max(self, app):
-        with app.app_context():
-            image = Image(filename="test.jpg", filepath="/uploads/quality_max.jpg")
-            db.session.add(image)
-            db.session.commit()
+            db.session.add(Insights(image_id=image.id, brightness=200))
+            with pytest.raises(IntegrityError):
+                db.session.commit()
+            db.session.rollback()
 
-            with pytest.raises(ValueError):
-                Insights(image_id=image.id, quality_score=101)  # noqa: F841
 
-    def test_quality_score_validation_min(self, app):
-        with app.app_context():
-            image = Image(filename="test.jpg", filepath="/uploads/quality_min.jpg")
-            db.session.add(image)
-            db.session.commit()
+class TestInsightsModelValidation:
+    def test_brightness_validation_max(self):
+        with pytest.raises(ValueError, match="Brightness"):
+            Insights(image_id=1, brightness=256)
 
-            with pytest.raises(ValueError):
-                Insights(image_id=image.id, quality_score=-1)  # noqa: F841
+    def test_brightness_validation_min(self):
+        with pytest.raises(ValueError, match="Brightness"):
+            Insights(image_id=1, brightness=-1)
 
-    def test_scene_confidence_validation_max(self, app):
-        with app.app_context():
-            image = Image(filename="test.jpg", filepath="/uploads/confidence_max.jpg")
-            db.session.add(image)
-            db.session.commit()
+    def test_quality_score_validation_max(self):
+        with pytest.raises(ValueError, match="Quality score"):
+            Insights(image_id=1, quality_score=101)
 
-            with pytest.raises(ValueError):
-                Insights(image_id=image.id, scene_confidence=1.1)  # noqa: F841
+    def test_quality_score_validation_min(self):
+        with pytest.raises(ValueError, match="Quality score"):
+            Insights(image_id=1, quality_score=-1)
 
-    def test_scene_confidence_validation_min(self, app):
-        with app.app_context():
-            image = Image(filename="test.jpg", filepath="/uploads/confidence_min.jpg")
-            db.session.add(image)
-            db.session.commit()
+    def test_scene_confidence_validation_max(self):
+        with pytest.raises(ValueError, match="Scene confidence"):
+            Insights(image_id=1, scene_confidence=1.1)
 
-            with pytest.raises(ValueError):
-                Insights(image_id=image.id, scene_confidence=-0.1)  # noqa: F841
+    def test_scene_confidence_validation_min(self):
+        with pytest.raises(ValueError, match="Scene confidence"):
+            Insights(image_id=1, scene_confidence=-0.1)
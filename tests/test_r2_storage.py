@@ -7,7 +7,6 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 from botocore.exceptions import ClientError, EndpointConnectionError
-from PIL import Image as PILImage
 from werkzeug.datastructures import FileStorage
 
 from app import db
@@ -16,7 +15,7 @@ from app import db
 class TestR2StorageService:
     """Test R2-specific storage service methods."""
 
-    @patch("app.services.storage_service.boto3.client")
+    @patch("boto3.client")
     def test_get_r2_client_with_valid_credentials(self, mock_boto_client, app):
         """Test R2 client creation with valid credentials."""
         from app.services.storage_service import StorageService
@@ -34,8 +33,34 @@ class TestR2StorageService:
             assert "test_account" in call_kwargs["endpoint_url"]
             assert call_kwargs["aws_access_key_id"] == "test_key"
             assert call_kwargs["aws_secret_access_key"] == "test_secret"
+            assert call_kwargs["config"].max_pool_connections == 50
+            assert call_kwargs["config"].tcp_keepalive is True
+            assert call_kwargs["config"].request_checksum_calculation == "when_required"
 
-    @patch("app.services.storage_service.boto3.client")
+    @patch("boto3.client")
+    def test_get_r2_client_is_reused(self, mock_boto_client, app):
+        """Test R2 client is built once and shared until it is reset."""
+        from app.services.storage_service import StorageService
+
+        with app.app_context():
+            app.config["R2_ACCOUNT_ID"] = "test_account"
+            app.config["R2_ACCESS_KEY_ID"] = "test_key"
+            app.config["R2_SECRET_ACCESS_KEY"] = "test_secret"
+
+            first = StorageService._get_r2_client()
+            second = StorageService._get_r2_client()
+
+            assert first is second
+            mock_boto_client.assert_called_once()
+
+            app.config["R2_ACCESS_KEY_ID"] = "rotated_key"
+            StorageService.reset_r2_client()
+            StorageService._get_r2_client()
+
+            assert mock_boto_client.call_count == 2
+            assert mock_boto_client.call_args[1]["aws_access_key_id"] == "rotated_key"
+
+    @patch("boto3.client")
     def test_get_r2_client_missing_credentials(self, mock_boto_client, app):
         """Test R2 client creation fails with missing credentials."""
         from app.services.storage_service import StorageService
@@ -48,11 +73,89 @@ class TestR2StorageService:
             with pytest.raises(ValueError, match="R2 credentials not configured"):
                 StorageService._get_r2_client()
 
-    @patch("app.services.storage_service.boto3.client")
-    def test_save_file_uploads_to_r2(self, mock_boto_client, app):
-        """Test file upload to R2."""
+    @patch("boto3.client")
+    def test_validate_r2_config_skips_bucket_probe_by_default(
+        self, mock_boto_client, app
+    ):
+        """Test startup validation does not hit the network unless enabled."""
+        from app import validate_r2_config
+
+        app.config["R2_ACCOUNT_ID"] = "test_account"
+        app.config["R2_ACCESS_KEY_ID"] = "test_key"
+        app.config["R2_SECRET_ACCESS_KEY"] = "test_secret"
+        app.config["R2_VALIDATE_ON_STARTUP"] = False
+
+        assert validate_r2_config(app) is True
+        mock_boto_client.assert_not_called()
+
+        assert validate_r2_config(app, check_bucket=True) is True
+        mock_boto_client.return_value.head_bucket.assert_called_once()
+
+    @patch("boto3.client")
+    def test_validate_r2_config_uses_single_attempt_probe_client(
+        self, mock_boto_client, app
+    ):
+        """Test bucket probes use a cached client with short timeouts and no retries."""
+        from app import validate_r2_config
         from app.services.storage_service import StorageService
 
+        app.config["R2_ACCOUNT_ID"] = "test_account"
+        app.config["R2_ACCESS_KEY_ID"] = "test_key"
+        app.config["R2_SECRET_ACCESS_KEY"] = "test_secret"
+
+        assert validate_r2_config(app, check_bucket=True) is True
+        assert validate_r2_config(app, check_bucket=True) is True
+
+        mock_boto_client.assert_called_once()
+        config = mock_boto_client.call_args[1]["config"]
+        assert config.retries == {"total_max_attempts": 1}
+        assert config.connect_timeout == StorageService.PROBE_TIMEOUT
+        assert config.read_timeout == StorageService.PROBE_TIMEOUT
+        assert mock_boto_client.return_value.head_bucket.call_count == 2
+
+    @patch("boto3.client")
+    def test_check_r2_storage_probes_once_under_concurrent_misses(
+        self, mock_boto_client, app
+    ):
+        """Test simultaneous health checks share a single bucket probe."""
+        import threading
+        import time
+
+        from app import _check_r2_storage, check_r2_storage
+
+        app.config["R2_ACCOUNT_ID"] = "test_account"
+        app.config["R2_ACCESS_KEY_ID"] = "test_key"
+        app.config["R2_SECRET_ACCESS_KEY"] = "test_secret"
+        mock_boto_client.return_value.head_bucket.side_effect = (
+            lambda **kwargs: time.sleep(0.05)
+        )
+        _check_r2_storage.cache_clear()
+
+        def probe():
+            with app.app_context():
+                results.append(check_r2_storage(app))
+
+        results = []
+        threads = [threading.Thread(target=probe) for _ in range(4)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            _check_r2_storage.cache_clear()
+
+        assert results == [True] * 4
+        mock_boto_client.return_value.head_bucket.assert_called_once()
+
+    @patch("boto3.client")
+    def test_save_file_uploads_to_r2(self, mock_boto_client, app, sample_image):
+        """Test file upload to R2."""
+        from app.services.storage_service import (
+            StorageService,
+            _upload_transfer_config,
+        )
+
         with app.app_context():
             app.config["R2_ACCOUNT_ID"] = "test_account"
             app.config["R2_ACCESS_KEY_ID"] = "test_key"
@@ -62,54 +165,39 @@ class TestR2StorageService:
             mock_s3 = MagicMock()
             mock_boto_client.return_value = mock_s3
 
-            img = PILImage.new("RGB", (100, 100), color="red")
-            img_bytes = BytesIO()
-            img.save(img_bytes, format="JPEG")
-            img_bytes.seek(0)
-
-            file_storage = FileStorage(stream=img_bytes, filename="test.jpg")
+            file_storage = FileStorage(stream=sample_image, filename="test.jpg")
 
             result = StorageService.save_file(file_storage)
 
             assert result.startswith("images/")
             assert result.endswith(".jpg")
             mock_s3.upload_fileobj.assert_called_once()
+            assert (
+                mock_s3.upload_fileobj.call_args[1]["Config"]
+                is _upload_transfer_config()
+            )
 
-    @patch("app.services.storage_service.boto3.client")
-    def test_save_file_retry_on_failure(self, mock_boto_client, app):
-        """Test retry logic when upload fails."""
+    @patch("boto3.client")
+    def test_get_r2_client_uses_adaptive_retries(self, mock_boto_client, app):
+        """Test retries are delegated to botocore's adaptive retry mode."""
         from app.services.storage_service import StorageService
 
         with app.app_context():
             app.config["R2_ACCOUNT_ID"] = "test_account"
             app.config["R2_ACCESS_KEY_ID"] = "test_key"
             app.config["R2_SECRET_ACCESS_KEY"] = "test_secret"
-            app.config["R2_BUCKET_NAME"] = "test-bucket"
 
-            mock_s3 = MagicMock()
-            mock_s3.upload_fileobj.side_effect = [
-                EndpointConnectionError(endpoint_url="test"),
-                EndpointConnectionError(endpoint_url="test"),
-                None,
-            ]
-            mock_boto_client.return_value = mock_s3
-
-            img = PILImage.new("RGB", (100, 100), color="blue")
-            img_bytes = BytesIO()
-            img.save(img_bytes, format="PNG")
-            img_bytes.seek(0)
-
-            file_storage = FileStorage(stream=img_bytes, filename="test.png")
-
-            with patch("time.sleep"):
-                result = StorageService.save_file(file_storage)
+            StorageService._get_r2_client()
 
-            assert result.startswith("images/")
-            assert mock_s3.upload_fileobj.call_count == 3
+            config = mock_boto_client.call_args[1]["config"]
+            assert config.retries == {
+                "mode": "adaptive",
+                "max_attempts": StorageService.MAX_RETRIES,
+            }
 
-    @patch("app.services.storage_service.boto3.client")
-    def test_save_file_max_retries_exceeded(self, mock_boto_client, app):
-        """Test failure after max retries."""
+    @patch("boto3.client")
+    def test_save_file_upload_failure(self, mock_boto_client, app, sample_image):
+        """Test upload errors surfacing from botocore are raised as IOError."""
         from app.services.storage_service import StorageService
 
         with app.app_context():
@@ -124,20 +212,14 @@ class TestR2StorageService:
             )
             mock_boto_client.return_value = mock_s3
 
-            img = PILImage.new("RGB", (100, 100), color="green")
-            img_bytes = BytesIO()
-            img.save(img_bytes, format="JPEG")
-            img_bytes.seek(0)
+            file_storage = FileStorage(stream=sample_image, filename="test.jpg")
 
-            file_storage = FileStorage(stream=img_bytes, filename="test.jpg")
+            with pytest.raises(IOError, match="Failed to save file"):
+                StorageService.save_file(file_storage)
 
-            with patch("time.sleep"):
-                with pytest.raises(IOError, match="Failed to save file"):
-                    StorageService.save_file(file_storage)
-
-            assert mock_s3.upload_fileobj.call_count == 3
+            mock_s3.upload_fileobj.assert_called_once()
 
-    @patch("app.services.storage_service.boto3.client")
+    @patch("boto3.client")
     def test_get_image_from_r2(self, mock_boto_client, app):
         """Test retrieving image from R2."""
         from app.models import Image
@@ -162,9 +244,7 @@ class TestR2StorageService:
             db.session.commit()
 
             mock_s3 = MagicMock()
-            mock_response = {
-                "Body": MagicMock(read=MagicMock(return_value=b"fake_image_data"))
-            }
+            mock_response = {"Body": BytesIO(b"fake_image_data")}
             mock_s3.get_object.return_value = mock_response
             mock_boto_client.return_value = mock_s3
 
@@ -176,7 +256,45 @@ class TestR2StorageService:
                 Bucket="test-bucket", Key="images/20250101_12345678.jpg"
             )
 
-    @patch("app.services.storage_service.boto3.client")
+    @patch("boto3.client")
+    def test_get_image_stream_does_not_buffer_body(self, mock_boto_client, app):
+        """Test streaming mode hands back body chunks instead of reading it all."""
+        from app.models import Image
+        from app.services.storage_service import StorageService
+
+        with app.app_context():
+            app.config["R2_ACCOUNT_ID"] = "test_account"
+            app.config["R2_ACCESS_KEY_ID"] = "test_key"
+            app.config["R2_SECRET_ACCESS_KEY"] = "test_secret"
+            app.config["R2_BUCKET_NAME"] = "test-bucket"
+
+            img_record = Image(
+                filename="test.png",
+                filepath="images/20250101_stream.png",
+                format="PNG",
+                processed=True,
+            )
+            db.session.add(img_record)
+            db.session.commit()
+
+            mock_body = MagicMock()
+            mock_body.iter_chunks.return_value = iter([b"chunk1", b"chunk2"])
+            mock_s3 = MagicMock()
+            mock_s3.get_object.return_value = {"Body": mock_body, "ContentLength": 12}
+            mock_boto_client.return_value = mock_s3
+
+            data, mimetype = StorageService.get_image(img_record.id, stream=True)
+
+            assert list(data) == [b"chunk1", b"chunk2"]
+            assert data.content_length == 12
+            assert mimetype == "image/png"
+            mock_body.read.assert_not_called()
+            mock_body.iter_chunks.assert_called_once_with(
+                StorageService.STREAM_CHUNK_SIZE
+            )
+            mock_body.close.assert_called()
+
+    @patch("boto3.client")
     def test_get_public_url_with_presigned(self, mock_boto_client, app):
         """Test generating presigned URL."""
         from app.models import Image
@@ -212,7 +330,13 @@ class TestR2StorageService:
             assert url == "https://presigned.url/image.jpg"
             mock_s3.generate_presigned_url.assert_called_once()
 
-    @patch("app.services.storage_service.boto3.client")
+            assert StorageService.get_public_url(img_record.id, expiration=3600) == url
+            mock_s3.generate_presigned_url.assert_called_once()
+
+            StorageService.get_public_url(img_record.id, expiration=7200)
+            assert mock_s3.generate_presigned_url.call_count == 2
+
+    @patch("boto3.client")
     def test_get_public_url_with_custom_domain(self, mock_boto_client, app):
         """Test public URL with custom domain."""
         from app.models import Image
@@ -245,7 +369,7 @@ class TestR2StorageService:
             assert url == "https://images.example.com/images/20250101_12345678.jpg"
             mock_s3.generate_presigned_url.assert_not_called()
 
-    @patch("app.services.storage_service.boto3.client")
+    @patch("boto3.client")
     def test_upload_file_to_r2_with_bytes(self, mock_boto_client, app):
         """Test uploading bytes data to R2."""
         from app.services.storage_service import StorageService
@@ -269,7 +393,7 @@ class TestR2StorageService:
             assert result == object_key
             mock_s3.upload_fileobj.assert_called_once()
 
-    @patch("app.services.storage_service.boto3.client")
+    @patch("boto3.client")
     def test_download_from_r2(self, mock_boto_client, app):
         """Test downloading file from R2."""
         from app.services.storage_service import StorageService
@@ -281,9 +405,7 @@ class TestR2StorageService:
             app.config["R2_BUCKET_NAME"] = "test-bucket"
 
             mock_s3 = MagicMock()
-            mock_response = {
-                "Body": MagicMock(read=MagicMock(return_value=b"downloaded_data"))
-            }
+            mock_response = {"Body": BytesIO(b"downloaded_data")}
             mock_s3.get_object.return_value = mock_response
             mock_boto_client.return_value = mock_s3
 
@@ -291,13 +413,80 @@ class TestR2StorageService:
 
             assert data == b"downloaded_data"
             mock_s3.get_object.assert_called_once_with(
-                Bucket="test-bucket", Key="images/test.jpg"
+                Bucket="test-bucket",
+                Key="images/test.jpg",
+                Range=f"bytes=0-{StorageService.DOWNLOAD_PART_SIZE - 1}",
+            )
+
+    @patch("boto3.client")
+    def test_download_from_r2_fetches_remaining_ranges_in_parallel(
+        self, mock_boto_client, app
+    ):
+        """Test large objects are reassembled from concurrent ranged GETs."""
+        from app.services.storage_service import StorageService
+
+        with app.app_context():
+            app.config["R2_ACCOUNT_ID"] = "test_account"
+            app.config["R2_ACCESS_KEY_ID"] = "test_key"
+            app.config["R2_SECRET_ACCESS_KEY"] = "test_secret"
+            app.config["R2_BUCKET_NAME"] = "test-bucket"
+
+            payload = bytes(range(256)) * 40
+
+            def get_object_side_effect(Bucket, Key, Range):
+                start, end = map(int, Range[len("bytes=") :].split("-"))
+                chunk = payload[start : end + 1]
+                return {
+                    "Body": BytesIO(chunk),
+                    "ContentRange": f"bytes {start}-{end}/{len(payload)}",
+                }
+
+            mock_s3 = MagicMock()
+            mock_s3.get_object.side_effect = get_object_side_effect
+            mock_boto_client.return_value = mock_s3
+
+            with patch.object(StorageService, "DOWNLOAD_PART_SIZE", 1024):
+                data = StorageService.download_from_r2("images/large.jpg")
+
+            assert data == payload
+            ranges = sorted(
+                call.kwargs["Range"] for call in mock_s3.get_object.call_args_list
             )
+            assert len(ranges) == 10
+            assert len(set(ranges)) == 10
 
-    @patch("app.services.storage_service.boto3.client")
+    @patch("boto3.client")
+    def test_download_from_r2_empty_object(self, mock_boto_client, app):
+        """Test a zero-byte object downloads as empty instead of failing the range."""
+        from app.services.storage_service import StorageService
+
+        with app.app_context():
+            app.config["R2_ACCOUNT_ID"] = "test_account"
+            app.config["R2_ACCESS_KEY_ID"] = "test_key"
+            app.config["R2_SECRET_ACCESS_KEY"] = "test_secret"
+
+            mock_s3 = MagicMock()
+            mock_s3.get_object.side_effect = ClientError(
+                {
+                    "Error": {"Code": "InvalidRange"},
+                    "ResponseMetadata": {"HTTPStatusCode": 416},
+                },
+                "GetObject",
+            )
+            mock_boto_client.return_value = mock_s3
+
+            assert StorageService.download_from_r2("images/empty.jpg") == b""
+
+            mock_s3.get_object.side_effect = ClientError(
+                {"Error": {"Code": "NoSuchKey"}}, "GetObject"
+            )
+            with pytest.raises(IOError, match="NoSuchKey"):
+                StorageService.download_from_r2("images/missing.jpg")
+
+    @patch("boto3.client")
     def test_get_annotated_image_falls_back_to_original(self, mock_boto_client, app):
         """Test annotated image fallback when annotation doesn't exist."""
-        from app.models import Image
+        from app.models import Image, Insights
         from app.services.storage_service import StorageService
 
         with app.app_context():
@@ -317,6 +506,8 @@ class TestR2StorageService:
             )
             db.session.add(img_record)
             db.session.commit()
+            db.session.add(Insights(image_id=img_record.id, faces_detected=1))
+            db.session.commit()
 
             mock_s3 = MagicMock()
 
@@ -325,11 +516,7 @@ class TestR2StorageService:
                     error_response = {"Error": {"Code": "404"}}
                     raise ClientError(error_response, "GetObject")
                 else:
-                    return {
-                        "Body": MagicMock(
-                            read=MagicMock(return_value=b"original_image")
-                        )
-                    }
+                    return {"Body": BytesIO(b"original_image")}
 
             mock_s3.get_object.side_effect = get_object_side_effect
             mock_boto_client.return_value = mock_s3
@@ -339,3 +526,74 @@ class TestR2StorageService:
             assert data == b"original_image"
             assert mimetype == "image/jpeg"
             assert mock_s3.get_object.call_count == 2
+
+    @patch("boto3.client")
+    def test_get_annotated_image_skips_probe_before_processing(
+        self, mock_boto_client, app
+    ):
+        """Test unprocessed images are served without probing for an annotation."""
+        from app.models import Image
+        from app.services.storage_service import StorageService
+
+        with app.app_context():
+            app.config["R2_ACCOUNT_ID"] = "test_account"
+            app.config["R2_ACCESS_KEY_ID"] = "test_key"
+            app.config["R2_SECRET_ACCESS_KEY"] = "test_secret"
+            app.config["R2_BUCKET_NAME"] = "test-bucket"
+
+            img_record = Image(
+                filename="test.jpg",
+                filepath="images/20250101_87654321.jpg",
+                file_size=1024,
+                format="JPEG",
+                width=100,
+                height=100,
+                processed=False,
+            )
+            db.session.add(img_record)
+            db.session.commit()
+
+            mock_s3 = MagicMock()
+            mock_s3.get_object.return_value = {"Body": BytesIO(b"original_image")}
+            mock_boto_client.return_value = mock_s3
+
+            data, mimetype = StorageService.get_annotated_image(img_record.id)
+
+            assert data == b"original_image"
+            mock_s3.get_object.assert_called_once_with(
+                Bucket="test-bucket", Key="images/20250101_87654321.jpg"
+            )
+
+    @patch("boto3.client")
+    def test_get_annotated_image_skips_probe_without_faces(self, mock_boto_client, app):
+        """Test processed images without faces are served without probing."""
+        from app.models import Image, Insights
+        from app.services.storage_service import StorageService
+
+        with app.app_context():
+            app.config["R2_ACCOUNT_ID"] = "test_account"
+            app.config["R2_ACCESS_KEY_ID"] = "test_key"
+            app.config["R2_SECRET_ACCESS_KEY"] = "test_secret"
+            app.config["R2_BUCKET_NAME"] = "test-bucket"
+
+            img_record = Image(
+                filename="test.jpg",
+                filepath="images/20250101_11223344.jpg",
+                format="JPEG",
+                processed=True,
+            )
+            db.session.add(img_record)
+            db.session.commit()
+            db.session.add(Insights(image_id=img_record.id, faces_detected=0))
+            db.session.commit()
+
+            mock_s3 = MagicMock()
+            mock_s3.get_object.return_value = {"Body": BytesIO(b"original_image")}
+            mock_boto_client.return_value = mock_s3
+
+            data, mimetype = StorageService.get_annotated_image(img_record.id)
+
+            assert data == b"original_image"
+            mock_s3.get_object.assert_called_once_with(
+                Bucket="test-bucket", Key="images/20250101_11223344.jpg"
+            )
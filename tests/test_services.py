@@ -6,8 +6,8 @@ from werkzeug.datastructures import FileStorage
 
 
 class TestStorageService:
-    @patch("app.services.storage_service.boto3.client")
-    def test_save_file_returns_filepath(self, mock_boto_client, app):
+    @patch("boto3.client")
+    def test_save_file_returns_filepath(self, mock_boto_client, app, sample_image):
         from app.services.storage_service import StorageService
 
         with app.app_context():
@@ -19,28 +19,18 @@ class TestStorageService:
             mock_s3 = MagicMock()
             mock_boto_client.return_value = mock_s3
 
-            img = Image.new("RGB", (100, 100), color="red")
-            img_bytes = BytesIO()
-            img.save(img_bytes, format="JPEG")
-            img_bytes.seek(0)
-
-            file_storage = FileStorage(stream=img_bytes, filename="test.jpg")
+            file_storage = FileStorage(stream=sample_image, filename="test.jpg")
 
             result = StorageService.save_file(file_storage)
             assert isinstance(result, str)
             assert ".jpg" in result
             assert result.startswith("images/")
 
-    def test_validate_file_valid_image(self, app):
+    def test_validate_file_valid_image(self, app, sample_png):
         from app.services.storage_service import StorageService
 
         with app.app_context():
-            img = Image.new("RGB", (100, 100), color="blue")
-            img_bytes = BytesIO()
-            img.save(img_bytes, format="PNG")
-            img_bytes.seek(0)
-
-            file_storage = FileStorage(stream=img_bytes, filename="test.png")
+            file_storage = FileStorage(stream=sample_png, filename="test.png")
 
             result = StorageService.validate_file(file_storage)
             assert result is True
@@ -54,7 +44,64 @@ class TestStorageService:
             result = StorageService.validate_file(file_storage)
             assert result is False
 
-    @patch("app.services.storage_service.boto3.client")
+    def test_validate_and_introspect_returns_metadata(self, app):
+        from app.services.storage_service import StorageService
+
+        with app.app_context():
+            img = Image.new("RGB", (120, 80), color="blue")
+            img_bytes = BytesIO()
+            img.save(img_bytes, format="PNG")
+            file_size = img_bytes.tell()
+            img_bytes.seek(0)
+
+            file_storage = FileStorage(stream=img_bytes, filename="test.png")
+
+            result = StorageService.validate_and_introspect(file_storage)
+
+            assert result == (True, "PNG", (120, 80), file_size)
+            assert file_storage.stream.tell() == 0
+
+    def test_validate_and_introspect_rejects_oversize_file(self, app, sample_image):
+        from app.services.storage_service import StorageService
+
+        with app.app_context():
+            app.config["MAX_FILE_SIZE"] = 100
+
+            file_storage = FileStorage(stream=sample_image, filename="test.jpg")
+
+            result = StorageService.validate_and_introspect(file_storage)
+
+            assert result == (False, None, (None, None), None)
+
+    def test_validate_and_introspect_rejects_truncated_image(self, app):
+        from app.services.storage_service import StorageService
+
+        with app.app_context():
+            img_bytes = BytesIO()
+            Image.new("RGB", (120, 80), color="blue").save(img_bytes, format="PNG")
+            truncated = BytesIO(img_bytes.getvalue()[:-20])
+
+            file_storage = FileStorage(stream=truncated, filename="test.png")
+
+            result = StorageService.validate_and_introspect(file_storage)
+
+            assert result[0] is False
+
+    def test_validate_and_introspect_rejects_non_image_before_pil(self, app):
+        from app.services.storage_service import StorageService
+
+        with app.app_context():
+            file_storage = FileStorage(
+                stream=BytesIO(b"not an image"), filename="x.png"
+            )
+
+            with patch("PIL.Image.open") as mock_open:
+                result = StorageService.validate_and_introspect(file_storage)
+
+            assert result[0] is False
+            mock_open.assert_not_called()
+
+    @patch("boto3.client")
     def test_get_image_returns_bytes(self, mock_boto_client, app):
         from app import db
         from app.models import Image as ImageModel
@@ -67,9 +114,7 @@ class TestStorageService:
             app.config["R2_BUCKET_NAME"] = "test-bucket"
 
             mock_s3 = MagicMock()
-            mock_response = {
-                "Body": MagicMock(read=MagicMock(return_value=b"test_image_data"))
-            }
+            mock_response = {"Body": BytesIO(b"test_image_data")}
             mock_s3.get_object.return_value = mock_response
             mock_boto_client.return_value = mock_s3
 
@@ -139,16 +184,35 @@ class TestImageService:
             assert result["status"] == "processing"
             assert result["id"] == image.id
 
+    def test_get_analysis_results_completed(self, app):
+        from app import db
+        from app.models import Image as ImageModel
+        from app.models import Insights
+        from app.services.image_service import ImageService
+
+        with app.app_context():
+            image = ImageModel(
+                filename="completed.jpg",
+                filepath="/uploads/completed_test.jpg",
+                processed=True,
+            )
+            db.session.add(image)
+            db.session.commit()
+
+            db.session.add(Insights(image_id=image.id, brightness=120))
+            db.session.commit()
+            db.session.expire_all()
+
+            result = ImageService.get_analysis_results(image.id)
+
+            assert result["status"] == "completed"
+            assert result["insights"]["brightness"] == 120
+
 
 class TestCVService:
     def test_process_image_returns_insights(self):
         from app.services.cv_service import CVService
 
-        img = Image.new("RGB", (100, 100), color="red")
-        img_bytes = BytesIO()
-        img.save(img_bytes, format="JPEG")
-        img_bytes.seek(0)
-
         with patch("app.services.cv_service.ColorAnalyzer.analyze") as mock_color:
             with patch("app.services.cv_service.FaceDetector.detect") as mock_face:
                 with patch(
@@ -175,3 +239,71 @@ class TestCVService:
 
                         assert isinstance(result, dict)
                         assert "dominant_colors" in result or "error" in result
+
+    def test_process_image_analyzer_failure_returns_error(self, tmp_path):
+        from app.services.cv_service import CVService
+
+        img = Image.new("RGB", (100, 100), color="red")
+        img.paste((255, 255, 255), (0, 0, 50, 100))
+        img_path = tmp_path / "test.jpg"
+        img.save(img_path)
+
+        with patch("app.services.cv_service.ColorAnalyzer.analyze") as mock_color:
+            mock_color.side_effect = ValueError("Color analysis failed: boom")
+
+            result = CVService.process_image(str(img_path))
+
+        assert result == {"error": "Color analysis failed: boom"}
+
+    def test_process_image_uniform_image_skips_expensive_analyzers(self, tmp_path):
+        from app.services.cv_service import CVService
+
+        img_path = tmp_path / "blank.png"
+        Image.new("RGB", (100, 100), color=(255, 0, 0)).save(img_path)
+
+        with patch("app.services.cv_service.ColorAnalyzer.analyze") as mock_color:
+            with patch("app.services.cv_service.FaceDetector.detect") as mock_face:
+                with patch(
+                    "app.services.cv_service.TextExtractor.extract"
+                ) as mock_text:
+                    result = CVService.process_image(str(img_path))
+
+        mock_color.assert_not_called()
+        mock_face.assert_not_called()
+        mock_text.assert_not_called()
+        assert result["dominant_colors"] == ["#ff0000"]
+        assert result["faces_detected"] == 0
+        assert result["text_found"] is False
+        assert "quality_score" in result
+        assert "scene_type" in result
+
+    def test_process_image_downscales_large_images(self, tmp_path):
+        from app.services.cv_service import CVService
+
+        img_path = tmp_path / "large.png"
+        img = Image.new("RGB", (3200, 800), color=(0, 0, 0))
+        img.paste((255, 255, 255), (0, 0, 1600, 800))
+        img.save(img_path)
+
+        seen_shapes = []
+
+        def fake_detect(img_array, gray=None):
+            seen_shapes.append(img_array.shape[:2])
+            return {
+                "faces_detected": 1,
+                "face_locations": [{"x": 10, "y": 20, "width": 30, "height": 40}],
+            }
+
+        with patch(
+            "app.services.cv_service.FaceDetector.detect", side_effect=fake_detect
+        ):
+            with patch(
+                "app.services.cv_service.TextExtractor.extract",
+                return_value={"text_found": False},
+            ):
+                result = CVService.process_image(str(img_path))
+
+        assert seen_shapes == [(400, 1600)]
+        assert result["face_locations"] == [
+            {"x": 20, "y": 40, "width": 60, "height": 80}
+        ]
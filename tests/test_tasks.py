@@ -0,0 +1,144 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import db
+from app.models import Image, Insights
+
+
+@pytest.fixture
+def tasks(app, monkeypatch):
+    from tasks import celery_tasks
+
+    monkeypatch.setattr(
+        celery_tasks.StorageService,
+        "download_from_r2",
+        MagicMock(return_value=b"image-bytes"),
+    )
+    monkeypatch.setattr(celery_tasks, "annotate_image_async", MagicMock())
+    return celery_tasks
+
+
+def _add_image(name):
+    image = Image(filename=f"{name}.jpg", filepath=f"images/{name}.jpg")
+    db.session.add(image)
+    db.session.commit()
+    return image
+
+
+FACE = {"x": 10, "y": 20, "width": 30, "height": 40}
+
+
+def _insights(brightness, faces=0):
+    return {
+        "brightness": brightness,
+        "faces_detected": faces,
+        "face_locations": [FACE] * faces,
+    }
+
+
+def _insights_for(image):
+    return db.session.execute(
+        db.select(Insights).where(Insights.image_id == image.id)
+    ).scalar_one_or_none()
+
+
+class TestProcessImageAsync:
+    def test_stores_insights_and_queues_annotation(self, tasks, monkeypatch):
+        image = _add_image("with_faces")
+        monkeypatch.setattr(
+            tasks.CVService,
+            "process_image",
+            MagicMock(return_value=_insights(120, faces=1)),
+        )
+
+        result = tasks.process_image_async(image.id)
+
+        assert result == {"image_id": image.id, "status": "completed"}
+        assert _insights_for(image).brightness == 120
+        assert db.session.get(Image, image.id).processed is True
+        tasks.annotate_image_async.delay.assert_called_once_with(image.filepath, [FACE])
+
+    def test_missing_image_returns_error(self, tasks):
+        assert tasks.process_image_async(999) == {"error": "Image not found"}
+
+    def test_reprocessing_updates_the_single_insights_row(self, tasks, monkeypatch):
+        image = _add_image("reprocess")
+        process_image = MagicMock(side_effect=[_insights(40), _insights(200)])
+        monkeypatch.setattr(tasks.CVService, "process_image", process_image)
+
+        tasks.process_image_async(image.id)
+        tasks.process_image_async(image.id)
+
+        rows = (
+            db.session.execute(db.select(Insights).where(Insights.image_id == image.id))
+            .scalars()
+            .all()
+        )
+        assert len(rows) == 1
+        db.session.refresh(rows[0])
+        assert rows[0].brightness == 200
+
+
+class TestAnnotateImageAsync:
+    def test_routed_to_annotate_queue(self):
+        from tasks.celery_tasks import celery
+
+        route = celery.amqp.router.route({}, "tasks.celery_tasks.annotate_image_async")
+        assert route["queue"].name == "annotate"
+
+    def test_uploads_annotated_copy(self, app, monkeypatch, sample_image):
+        from tasks import celery_tasks
+
+        monkeypatch.setattr(
+            celery_tasks.StorageService,
+            "download_from_r2",
+            MagicMock(return_value=sample_image.getvalue()),
+        )
+        upload = MagicMock()
+        monkeypatch.setattr(celery_tasks.StorageService, "upload_file_to_r2", upload)
+
+        key = celery_tasks.annotate_image_async("images/a.jpg", [FACE])
+
+        assert key == "images/a_annotated.jpg"
+        assert upload.call_args[0][1] == key
+
+    def test_retries_transient_errors(self, app, monkeypatch):
+        from tasks import celery_tasks
+
+        create = MagicMock(side_effect=[OSError("R2 unavailable"), "annotated.jpg"])
+        monkeypatch.setattr(
+            celery_tasks.AnnotationService, "create_annotated_image", create
+        )
+
+        result = celery_tasks.annotate_image_async.apply(args=("images/a.jpg", [FACE]))
+
+        assert result.get() == "annotated.jpg"
+        assert create.call_count == 2
+
+    def test_gives_up_after_max_retries(self, app, monkeypatch):
+        from tasks import celery_tasks
+
+        create = MagicMock(side_effect=OSError("R2 unavailable"))
+        monkeypatch.setattr(
+            celery_tasks.AnnotationService, "create_annotated_image", create
+        )
+
+        result = celery_tasks.annotate_image_async.apply(args=("images/a.jpg", [FACE]))
+
+        assert result.failed()
+        assert isinstance(result.result, OSError)
+        assert create.call_count == celery_tasks.annotate_image_async.max_retries + 1
+
+    def test_bad_image_fails_without_retry(self, app, monkeypatch):
+        from tasks import celery_tasks
+
+        create = MagicMock(side_effect=ValueError("Failed to decode image"))
+        monkeypatch.setattr(
+            celery_tasks.AnnotationService, "create_annotated_image", create
+        )
+
+        result = celery_tasks.annotate_image_async.apply(args=("images/a.jpg", [FACE]))
+
+        assert result.failed()
+        create.assert_called_once()
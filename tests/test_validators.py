@@ -1,4 +1,5 @@
 from io import BytesIO
+from unittest.mock import MagicMock
 
 import pytest
 from PIL import Image
@@ -59,6 +60,16 @@ class TestFileSizeValidation:
 
         assert validate_file_size(file_storage, 1024) is True
 
+    def test_uses_precomputed_size(self):
+        from app.utils.validators import validate_file_size
+
+        stream = MagicMock(wraps=BytesIO(b"a" * 100))
+        file_storage = FileStorage(stream=stream, filename="test.jpg")
+
+        assert validate_file_size(file_storage, 1024, file_size=100) is True
+        assert validate_file_size(file_storage, 1024, file_size=2000) is False
+        stream.seek.assert_not_called()
+
 
 class TestImageContentValidation:
     def test_valid_jpeg_magic_bytes(self):
@@ -85,6 +96,18 @@ class TestImageContentValidation:
 
         assert validate_image_content(file_storage) is True
 
+    def test_valid_webp_magic_bytes(self):
+        from app.utils.validators import validate_image_content
+
+        img = Image.new("RGB", (10, 10), color="green")
+        img_bytes = BytesIO()
+        img.save(img_bytes, format="WEBP")
+        img_bytes.seek(0)
+
+        file_storage = FileStorage(stream=img_bytes, filename="test.webp")
+
+        assert validate_image_content(file_storage) is True
+
     def test_invalid_image_content(self):
         from app.utils.validators import validate_image_content
 
@@ -116,6 +139,13 @@ class TestFilenameSanitization:
         assert ".." not in result
         assert result == "file.jpg"
 
+    def test_sanitize_backslash_traversal(self):
+        from app.utils.validators import sanitize_filename
+
+        result = sanitize_filename("..\\..\\.\\.evil.jpg")
+        assert "\\" not in result
+        assert ".." not in result
+
     def test_sanitize_null_bytes(self):
         from app.utils.validators import sanitize_filename
 